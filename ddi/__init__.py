@@ -1 +1,2 @@
+from .convert.batch import batch_statistics
 from .convert.stata_to_statistics import stata_to_statistics
@@ -0,0 +1,349 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert.density import density as calculate_density
+from ddi.convert.density import kde_bins, linear_binning, moments_bandwidth
+from ddi.convert.frequencies import CategoricalCodes, missing_frequencies
+from ddi.convert.quantiles import SUMMARY_NAMES
+
+# distinct values kept per variable for exact quantiles and densities
+MAX_DISTINCT = 10000
+
+
+class ValueCounts:
+    """
+    Counts of the distinct values of a stream of arrays.
+
+    Above max_distinct (MAX_DISTINCT if None) values the counts are dropped (overflow).
+    """
+
+    def __init__(self, max_distinct=None):
+        self.max_distinct = MAX_DISTINCT if max_distinct is None else max_distinct
+        self.values = None
+        self.counts = None
+        self.overflow = False
+
+    def add(self, values, counts=None):
+        if self.overflow or values.size == 0:
+            return
+        if counts is None:
+            values, counts = np.unique(values, return_counts=True)
+        if self.values is not None:
+            values, inverse = np.unique(
+                np.concatenate([self.values, values]), return_inverse=True
+            )
+            counts = np.bincount(
+                inverse, weights=np.concatenate([self.counts, counts])
+            ).astype(np.int64)
+        if values.size > self.max_distinct:
+            self.overflow = True
+            self.values = None
+            self.counts = None
+        else:
+            self.values = values
+            self.counts = counts
+
+
+class DistinctCount:
+    """
+    Number of distinct values of a stream of arrays in bounded memory.
+
+    Up to max_distinct (MAX_DISTINCT if None) values the values are kept and the
+    count is exact. Above (overflow), only the max_distinct smallest hashes of the
+    values are kept and the count is estimated from the largest of them
+    (k minimum values, relative error about 1 / sqrt(max_distinct)).
+    """
+
+    def __init__(self, max_distinct=None):
+        self.max_distinct = MAX_DISTINCT if max_distinct is None else max_distinct
+        self.values = set()
+        self.hashes = None
+
+    @property
+    def overflow(self):
+        return self.hashes is not None
+
+    def add(self, values):
+        if self.hashes is None:
+            self.values.update(values)
+            if len(self.values) <= self.max_distinct:
+                return
+            values = list(self.values)
+            self.values = set()
+            self.hashes = np.empty(0, dtype=np.uint64)
+        if len(values):
+            hashes = pd.util.hash_array(np.asarray(values, dtype=object))
+            self.hashes = np.union1d(self.hashes, hashes)[: self.max_distinct]
+
+    def count(self):
+        if self.hashes is None:
+            return len(self.values)
+        # the k-th smallest of n uniform hashes is at about k / n of the range
+        return int(round((self.max_distinct - 1) * 2.0**64 / float(self.hashes[-1])))
+
+
+def ranked(values, counts, ranks):
+    """
+    Values at the ranks (0-based) of the sorted values with their counts.
+    """
+    positions = np.searchsorted(np.cumsum(counts), ranks, "right")
+    return values[np.minimum(positions, len(values) - 1)]
+
+
+def median_of_ranks(values, counts, start, n):
+    """
+    Median of the n sorted values from rank start, like quantiles.sorted_median.
+    """
+    if n == 0:
+        return np.float64(np.nan)
+    return np.median(ranked(values, counts, [start + (n - 1) // 2, start + n // 2]))
+
+
+class NumberAccumulator:
+    """
+    Statistics of a numeric variable over chunks of rows.
+
+    Keeps counts, missing codes (in order of their first occurrence) and their
+    weighted counts, min, max, moments and the counts of the distinct values.
+    Above MAX_DISTINCT values a second pass over the data bins the values on the
+    grid of the binned kde (start_bins, add_bins); densities and quantiles then
+    come from the grid.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.n_nan = 0
+        self.dtype = None
+        self.missings = OrderedDict()
+        self.weighted_missings = None
+        self.n = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.counts = ValueCounts()
+        self.grid = None
+        self.binned = None
+
+    def _update_dtype(self, dtype):
+        self.dtype = dtype if self.dtype is None else np.result_type(self.dtype, dtype)
+
+    def add(self, profile, weights=None):
+        """
+        Add the rows of a ColumnProfile (weights: weight of every row).
+        """
+        self.size += profile.size
+        self.n_nan += profile.n_nan
+        self._update_dtype(profile.values.dtype)
+        missing_values, counts = profile.missings
+        if weights is not None:
+            weighted = missing_frequencies(profile.floats, weights)[1]
+            if self.weighted_missings is None:
+                self.weighted_missings = OrderedDict()
+        for i, value in enumerate(missing_values):
+            self.missings[value] = self.missings.get(value, 0) + counts[i]
+            if weights is not None:
+                self.weighted_missings[value] = (
+                    self.weighted_missings.get(value, 0.0) + weighted[i]
+                )
+        values = profile.valid_floats
+        if values.size:
+            self._merge_moments(
+                values.size,
+                values.sum(),
+                values.mean(),
+                ((values - values.mean()) ** 2).sum(),
+                values.min(),
+                values.max(),
+            )
+        self.counts.add(profile.valid)
+
+    def _merge_moments(self, n, total, mean, m2, min_val, max_val):
+        count = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / count
+        self.m2 += m2 + delta * delta * self.n * n / count
+        self.n = count
+        self.total += total
+        self.min = min(self.min, min_val)
+        self.max = max(self.max, max_val)
+
+    def bandwidth(self):
+        if self.n < 2:
+            return None
+        return moments_bandwidth(self.n, np.sqrt(self.m2 / (self.n - 1)))
+
+    @property
+    def needs_bins(self):
+        """True if the distinct values overflowed and the grid is not filled yet."""
+        return self.counts.overflow and self.grid is None and self.n > 0
+
+    def start_bins(self):
+        """Grid of the binned kde from the exact min, max and bandwidth."""
+        bandwidth = self.bandwidth()
+        if bandwidth is None:
+            num_bins = 2
+        else:
+            num_bins = kde_bins(self.min, self.max, bandwidth)
+        self.grid = (self.min, self.max, num_bins)
+        self.binned = np.zeros(num_bins)
+
+    def add_bins(self, profile):
+        values = profile.valid_floats
+        if values.size:
+            self.binned += linear_binning(values, *self.grid)[1]
+
+    def missing_frequencies(self):
+        """Missing codes and their frequencies as missing_frequencies."""
+        values = np.array(list(self.missings.keys()), dtype=np.float64)
+        counts = np.array(list(self.missings.values()), dtype=np.int64)
+        return values, counts
+
+    def weighted_missing_frequencies(self):
+        if self.weighted_missings is None:
+            return None
+        return np.array([self.weighted_missings.get(v, 0.0) for v in self.missings])
+
+    def distribution(self):
+        """Distinct values (or grid points) and their counts."""
+        if not self.counts.overflow:
+            return self.counts.values, self.counts.counts
+        grid = np.linspace(*self.grid)
+        occupied = self.binned > 0
+        return grid[occupied], self.binned[occupied]
+
+    def density(self, num_density_elements=20, mode="kde"):
+        if self.n == 0:
+            return calculate_density(np.empty(0), num_density_elements, mode)
+        values, counts = self.distribution()
+        bandwidth = self.bandwidth() if self.counts.overflow else None
+        return calculate_density(
+            np.asarray(values, dtype=np.float64),
+            num_density_elements,
+            mode,
+            np.asarray(counts, dtype=np.float64),
+            bandwidth,
+        )
+
+    def summary(self):
+        """
+        Same as quantiles.summary (quantiles from the grid after an overflow).
+        """
+        values, counts = self.distribution()
+        if not self.counts.overflow:
+            values = values.astype(self.dtype)
+        n = self.n
+        mid = n // 2
+        upper = mid if n % 2 == 0 else mid + 1
+        float_values = np.asarray(values, dtype=np.float64)
+        if self.dtype.kind == "f":
+            mean = self.dtype.type(self.total) / self.dtype.type(n)
+        else:
+            mean = self.total / n
+        return OrderedDict(
+            zip(
+                SUMMARY_NAMES,
+                [
+                    np.array(self.min).astype(self.dtype).item(),
+                    median_of_ranks(float_values, counts, 0, mid),
+                    median_of_ranks(values, counts, 0, n),
+                    mean,
+                    median_of_ranks(float_values, counts, upper, n - upper),
+                    np.array(self.max).astype(self.dtype).item(),
+                    self.size - self.n_nan,
+                    self.n_nan,
+                ],
+            )
+        )
+
+
+class CategoricalAccumulator:
+    """
+    Frequencies of a categorical variable over chunks of rows.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+        self.frequencies = np.zeros(len(self.values), dtype=np.int64)
+        self.weighted = None
+        self.size = 0
+        self.null_count = 0
+        self.n_valid = 0
+        self.dtype = None
+        self.counts = ValueCounts(max(MAX_DISTINCT, 2 * len(self.values)))
+
+    def add_frequencies(self, frequencies, weighted=None):
+        self.frequencies += frequencies.astype(np.int64)
+        if weighted is not None:
+            if self.weighted is None:
+                self.weighted = np.zeros(len(self.values))
+            self.weighted += weighted
+
+    def add(self, profile, weights=None):
+        """
+        Add the rows of a ColumnProfile (weights: weight of every row).
+        """
+        codes = CategoricalCodes(profile.column, self.values)
+        weighted = None if weights is None else codes.frequencies(weights)[0]
+        self.add_frequencies(codes.frequencies()[0], weighted)
+        self.size += profile.size
+        self.null_count += profile.null_count
+        self.n_valid += profile.n_valid
+        self.dtype = (
+            profile.values.dtype
+            if self.dtype is None
+            else np.result_type(self.dtype, profile.values.dtype)
+        )
+        self.counts.add(profile.valid)
+
+    def median(self):
+        if self.counts.overflow:
+            return np.float64(np.nan)
+        if self.counts.values is None:
+            return np.float64(np.nan)
+        values = self.counts.values.astype(self.dtype)
+        return median_of_ranks(values, self.counts.counts, 0, self.n_valid)
+
+
+class StringAccumulator:
+    """
+    Distinct values, missings and empty values of a string variable over chunks of rows.
+
+    missing_mask marks the missing values of an array of distinct values
+    (write_stats.string_missing_mask). The distinct values and the distinct missing
+    values are counted in bounded memory (DistinctCount): above MAX_DISTINCT values,
+    the counts are estimates.
+    """
+
+    def __init__(self, missing_mask):
+        self.missing_mask = missing_mask
+        self.valid = DistinctCount()
+        self.missing = DistinctCount()
+        self.has_nan = False
+        self.size = 0
+        self.null_count = 0
+        self.empty = 0
+
+    def add_unique(self, unique):
+        # NaN is counted once as a missing value ("nan"), as with pd.unique
+        unique = np.asarray(unique, dtype=object)
+        nan = np.array([isinstance(v, float) and v != v for v in unique], dtype=bool)
+        if nan.any():
+            self.has_nan = True
+            unique = unique[~nan]
+        missing = self.missing_mask(unique)
+        self.valid.add(unique[~missing])
+        self.missing.add(unique[missing])
+
+    def add(self, column):
+        self.add_unique(pd.unique(column))
+        self.size += int(column.size)
+        self.null_count += int(column.isnull().sum())
+        self.empty += int(column.isin(["", "."]).sum())
+
+    def distinct_counts(self):
+        """Numbers of the distinct valid and of the distinct missing values."""
+        return self.valid.count(), self.missing.count() + int(self.has_nan)
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ddi.convert.cache import StatsCache
+from ddi.convert.stata_to_statistics import (
+    INPUT_FORMATS,
+    dataset_rows,
+    dataset_to_statistics,
+)
+
+logger = logging.getLogger(__name__)
+
+# change if the manifest changes, old manifests are ignored (all datasets are stale)
+MANIFEST_VERSION = 1
+
+# name of the manifest in output_path
+MANIFEST_NAME = "statistics_manifest.json"
+
+
+def input_files(path):
+    """
+    Files of an input: the file itself or the files of a directory (columnar format).
+    """
+    if os.path.isdir(path):
+        return sorted(entry.path for entry in os.scandir(path) if entry.is_file())
+    return [path]
+
+
+def file_hash(file_name):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_name, "rb") as input_file:
+        for block in iter(lambda: input_file.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def input_state(inputs, known=None):
+    """
+    Size, modification time (ns) and hash of every file of the inputs.
+
+    Files with the same size and modification time as in known (Manifest.known)
+    keep their hash, only the other files are read.
+    """
+    if known is None:
+        known = dict()
+    state = dict()
+    for path in inputs:
+        for file_name in input_files(path):
+            stat = os.stat(file_name)
+            file_state = known.get(file_name)
+            if (
+                file_state is None
+                or file_state["size"] != stat.st_size
+                or file_state["mtime"] != stat.st_mtime_ns
+            ):
+                file_state = dict(
+                    size=stat.st_size,
+                    mtime=stat.st_mtime_ns,
+                    hash=file_hash(file_name),
+                )
+            state[file_name] = dict(file_state)
+    return state
+
+
+class Manifest:
+    """
+    Datasets of batch_statistics with their output and the state of their inputs.
+
+    A dataset is fresh (make-style) if its output exists, its parameters are the
+    same and no input file changed. Files with the same size and modification time
+    are unchanged; if only the modification time changed, the hash decides.
+
+    Example:
+
+        manifest = Manifest("../output/statistics_manifest.json")
+        manifest.fresh("dataset", description, ["../input/dataset.dta"])
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = dict()
+        # states of the files hashed by fresh (see known)
+        self.hashed = dict()
+        try:
+            with open(path) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest["version"] == MANIFEST_VERSION:
+                self.entries = manifest["datasets"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def fresh(self, name, description, inputs):
+        entry = self.entries.get(name)
+        if entry is None or entry["description"] != description:
+            return False
+        if not os.path.exists(entry["output"]):
+            return False
+        files = [file_name for path in inputs for file_name in input_files(path)]
+        if sorted(files) != sorted(entry["inputs"]):
+            return False
+        for file_name in files:
+            known = entry["inputs"][file_name]
+            stat = os.stat(file_name)
+            if stat.st_size != known["size"]:
+                return False
+            if stat.st_mtime_ns != known["mtime"]:
+                digest = file_hash(file_name)
+                self.hashed[file_name] = dict(
+                    size=stat.st_size, mtime=stat.st_mtime_ns, hash=digest
+                )
+                if digest != known["hash"]:
+                    return False
+                # only touched: the next run needs no hash
+                known["mtime"] = stat.st_mtime_ns
+        return True
+
+    def known(self, name):
+        """
+        Known state of the input files of a dataset (for input_state): the manifest
+        entry and the files hashed by fresh.
+        """
+        state = dict(self.entries.get(name, dict()).get("inputs", dict()))
+        state.update(self.hashed)
+        return state
+
+    def record(self, name, description, output, state):
+        self.entries[name] = dict(description=description, output=output, inputs=state)
+
+    def save(self):
+        # write to a temporary file first: an interrupted run keeps the old manifest
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "w") as manifest_file:
+            json.dump(
+                dict(version=MANIFEST_VERSION, datasets=self.entries),
+                manifest_file,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(temp_name, self.path)
+
+
+def run_dataset(
+    study_name,
+    row,
+    inputs,
+    known,
+    input_path,
+    output_path,
+    input_path_de,
+    cache_path,
+    cache_size,
+    input_format,
+):
+    # the state is taken before the data is read: changes during the run
+    # make the dataset stale for the next run
+    state = input_state(inputs, known)
+    cache = None
+    if cache_path != "":
+        cache = StatsCache(cache_path, cache_size)
+    output = dataset_to_statistics(
+        study_name, row, input_path, output_path, input_path_de, cache, input_format
+    )
+    return output, state
+
+
+def batch_statistics(
+    study_name,
+    input_csv,
+    input_path,
+    output_path,
+    input_path_de="",
+    cache_path="",
+    cache_size=2**30,
+    input_format="stata",
+    jobs=1,
+    manifest_name="",
+):
+    """
+    Write the statistics of all datasets in input_csv (as stata_to_statistics)
+    in a pool of jobs processes, only for datasets which changed since the last run.
+
+    The largest datasets are started first, so a few large files do not leave the
+    other workers idle at the end. Every finished dataset is recorded in the manifest
+    (see Manifest) at once: after a failure, a rerun starts with the remaining datasets.
+
+    Parameter:
+
+    jobs: Number of processes, one dataset per process
+    manifest_name: Name of the manifest (output_path + MANIFEST_NAME if "")
+
+    Returns the names of the datasets with new statistics.
+
+    Example:
+
+        batch_statistics("soep", "datasets.csv", "../input/", "../output/", jobs=4)
+    """
+    if manifest_name == "":
+        manifest_name = output_path + MANIFEST_NAME
+    manifest = Manifest(manifest_name)
+    extension = INPUT_FORMATS[input_format][0]
+
+    tasks = []
+    for row in dataset_rows(input_csv):
+        name = row["filename"]
+        inputs = [input_path + name + extension]
+        if input_path_de != "":
+            inputs.append(input_path_de + name + extension)
+        missing = [path for path in inputs if not os.path.exists(path)]
+        if missing:
+            logger.warning("Unable to find " + ", ".join(missing) + ".")
+            continue
+        # parameters of the statistics, NaN (empty cells) as string
+        description = json.dumps(
+            dict(
+                row=row,
+                study_name=study_name,
+                input_path=input_path,
+                output_path=output_path,
+                input_path_de=input_path_de,
+                input_format=input_format,
+            ),
+            sort_keys=True,
+            default=str,
+        )
+        if manifest.fresh(name, description, inputs):
+            logger.info(name + " is up to date")
+            continue
+        size = sum(
+            os.path.getsize(file_name)
+            for path in inputs
+            for file_name in input_files(path)
+        )
+        known = manifest.known(name)
+        tasks.append((size, name, description, inputs, known, row))
+    manifest.save()
+    tasks.sort(key=lambda task: task[0], reverse=True)
+
+    parameters = (
+        input_path,
+        output_path,
+        input_path_de,
+        cache_path,
+        cache_size,
+        input_format,
+    )
+    done = []
+
+    def finish(name, description, result):
+        output, state = result
+        if output is not None:
+            manifest.record(name, description, output, state)
+            manifest.save()
+            done.append(name)
+
+    if jobs <= 1:
+        for _, name, description, inputs, known, row in tasks:
+            try:
+                result = run_dataset(study_name, row, inputs, known, *parameters)
+            except Exception:
+                logger.exception("[ERROR] in dataset %s" % name)
+                continue
+            finish(name, description, result)
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # the pool starts the tasks in the order of submission (largest first)
+            futures = {
+                executor.submit(
+                    run_dataset, study_name, row, inputs, known, *parameters
+                ): (name, description)
+                for _, name, description, inputs, known, row in tasks
+            }
+            for future in as_completed(futures):
+                name, description = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.exception("[ERROR] in dataset %s" % name)
+                    continue
+                finish(name, description, result)
+    logger.info(
+        "%d of %d datasets computed, %d failed or missing"
+        % (len(done), len(tasks), len(tasks) - len(done))
+    )
+    return done
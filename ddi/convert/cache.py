@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# change if the statistics of write_stats change, old entries are never hit again
+CACHE_VERSION = 1
+
+
+def fingerprint(column):
+    """
+    Hash of the content and the dtype of a column.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(column.dtype).encode())
+    digest.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class StatsCache:
+    """
+    Statistics of variables on disk, one json file per key.
+
+    The key is a hash of the column data and everything else the statistics
+    depend on (see write_stats.cache_key). If the files exceed max_size bytes,
+    the least recently used files are removed. The files are json (not pickle):
+    loading an entry of a shared cache directory never runs code.
+
+    Example:
+
+        cache = StatsCache("../cache")
+        dataset.write_stats("../output/dataset.json", cache=cache)
+    """
+
+    def __init__(self, path, max_size=2**30):
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+        self.size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return [
+            entry
+            for entry in os.scandir(self.path)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + ".json")
+
+    def key(self, description, columns):
+        """
+        Key from a json serializable description and the fingerprints of columns.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(str(CACHE_VERSION).encode())
+        digest.update(json.dumps(description, sort_keys=True, default=str).encode())
+        for column in columns:
+            digest.update(column.encode())
+        return digest.hexdigest()
+
+    def has(self, key):
+        """
+        Whether key is in the cache (without loading it), a missing key is a miss.
+        """
+        if os.path.exists(self._filename(key)):
+            return True
+        self.misses += 1
+        return False
+
+    def get(self, key):
+        """
+        Cached statistics of key or None.
+        """
+        filename = self._filename(key)
+        try:
+            with open(filename) as cache_file:
+                # the statistics are built from OrderedDicts (i.e. for yaml)
+                stat = json.load(cache_file, object_pairs_hook=OrderedDict)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # the modification time orders the entries for the eviction
+        os.utime(filename)
+        self.hits += 1
+        return stat
+
+    def put(self, key, stat):
+        """
+        Store the statistics of key and remove old entries above max_size.
+        """
+        filename = self._filename(key)
+        handle, temp_name = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(handle, "w") as cache_file:
+            json.dump(stat, cache_file, separators=(",", ":"))
+        if os.path.exists(filename):
+            self.size -= os.path.getsize(filename)
+        os.replace(temp_name, filename)
+        self.size += os.path.getsize(filename)
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        # other processes (i.e. batch_statistics) may remove entries at the same time
+        entries = []
+        for entry in self._entries():
+            try:
+                entries.append(
+                    (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                )
+            except FileNotFoundError:
+                pass
+        entries.sort()
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.size <= self.max_size:
+                break
+            self.size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def log(self):
+        logger.info(
+            "statistics cache %s: %d hits, %d misses"
+            % (self.path, self.hits, self.misses)
+        )
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert.columns import select_columns, select_fields
+
+logger = logging.getLogger(__name__)
+
+# change if the layout of the files changes
+COLUMNAR_VERSION = 1
+
+
+def json_value(value):
+    # numpy scalars in the distinct values of object columns
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError("%r is not JSON serializable" % value)
+
+
+def write_columnar(d, m, output_path):
+    """
+    Write every column as binary .npy file and the metadata as json into output_path.
+
+    Numeric, boolean and date columns are written as they are. All other columns
+    (i.e. strings) are written as integer codes (.npy) and their distinct values (.json).
+    The index is not written (as in write_tdp).
+
+    Files in output_path:
+
+    metadata.json: tdp metadata (m)
+    columns.json: names and files of the columns
+    column_<i>.npy, column_<i>.json: data of the i-th column
+    """
+    logger.info('write "' + output_path + '"')
+    os.makedirs(output_path, exist_ok=True)
+    columns = []
+    for i, name in enumerate(d.columns):
+        column = d[name]
+        entry = dict(name=name, file="column_%d.npy" % i, categories=None)
+        if column.dtype.kind in "biufcmM" and isinstance(column.dtype, np.dtype):
+            values = column.to_numpy()
+        else:
+            codes, uniques = pd.factorize(column)
+            values = codes.astype(np.min_scalar_type(-max(len(uniques), 1)))
+            entry["categories"] = "column_%d.json" % i
+            with open(os.path.join(output_path, entry["categories"]), "w") as f:
+                json.dump(list(uniques), f, default=json_value)
+        np.save(os.path.join(output_path, entry["file"]), values, allow_pickle=False)
+        columns.append(entry)
+    with open(os.path.join(output_path, "columns.json"), "w") as json_file:
+        json.dump(
+            dict(version=COLUMNAR_VERSION, rows=len(d), columns=columns),
+            json_file,
+            indent=2,
+        )
+    with open(os.path.join(output_path, "metadata.json"), "w") as json_file:
+        json.dump(m, json_file, indent=2)
+
+
+def read_column(input_path, entry, rows):
+    """
+    Data of one column; numeric columns are memory-mapped, changes stay in memory.
+    """
+    mmap_mode = "c" if rows > 0 else None
+    values = np.load(os.path.join(input_path, entry["file"]), mmap_mode=mmap_mode)
+    if entry["categories"] is None:
+        return values
+    with open(os.path.join(input_path, entry["categories"])) as json_file:
+        categories = np.array(json.load(json_file) + [np.nan], dtype=object)
+    # code -1 (NaN) is the last value of categories
+    return categories[values]
+
+
+def read_columnar_metadata(input_path):
+    """
+    Metadata written by write_columnar, no column is opened.
+
+    Example:
+
+        m = read_columnar_metadata("../input/dataset")
+    """
+    logger.info('read metadata of "' + input_path + '"')
+    with open(os.path.join(input_path, "metadata.json")) as json_file:
+        return json.load(json_file)
+
+
+def read_columnar(input_path, columns=None, split="", weight=""):
+    """
+    Read data and metadata written by write_columnar.
+
+    Only the files of the selected columns are opened (see select_columns),
+    numeric columns are memory-mapped and not copied.
+
+    Parameter:
+
+    input_path: Directory of write_columnar
+    columns: Names of the variables to read (all if None)
+    split: Name of the split variable(s), read with columns
+    weight: Name of the weight variable, read with columns
+
+    Example:
+
+        d, m = read_columnar("../input/dataset", columns=["inc"], split="wave")
+    """
+    logger.info('read "' + input_path + '"')
+    with open(os.path.join(input_path, "columns.json")) as json_file:
+        layout = json.load(json_file)
+    if layout["version"] != COLUMNAR_VERSION:
+        raise ValueError(
+            "%s has version %s of the columnar format, expected %s"
+            % (input_path, layout["version"], COLUMNAR_VERSION)
+        )
+    with open(os.path.join(input_path, "metadata.json")) as json_file:
+        m = json.load(json_file)
+    entries = layout["columns"]
+    if columns is not None:
+        names = [entry["name"] for entry in entries]
+        selected = set(select_columns(names, columns, split, weight))
+        entries = [entry for entry in entries if entry["name"] in selected]
+        m = select_fields(m, selected)
+    data = {
+        entry["name"]: read_column(input_path, entry, layout["rows"])
+        for entry in entries
+    }
+    # copy=False keeps one block per column: the memory maps are not copied
+    d = pd.DataFrame(
+        data,
+        index=pd.RangeIndex(layout["rows"]),
+        columns=[entry["name"] for entry in entries],
+        copy=False,
+    )
+    return d, m
@@ -0,0 +1,56 @@
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def select_columns(names, columns=None, split="", weight=""):
+    """
+    Names of the variables to read for the statistics of columns.
+
+    The split and weight variables are added, because every variable depends on them.
+
+    Parameter:
+
+    names: Names of all variables in the data
+    columns: Names of the selected variables (all if None)
+    split: Name of the variable(s) for bivariate statistics
+    weight: Name of the weight variable
+
+    Returns the selected names in the order of names.
+
+    Example:
+
+        select_columns(["pid", "inc", "sex", "wave"], ["inc"], split="wave")
+        # ["inc", "wave"]
+    """
+    if columns is None:
+        return list(names)
+    unknown = set(columns).difference(names)
+    if unknown:
+        logger.warning("unknown variables: %s" % ", ".join(sorted(unknown)))
+    selected = []
+    for name in names:
+        try:
+            in_split = split != "" and name in split
+        except TypeError:
+            in_split = False
+        if name in columns or in_split or (weight != "" and name == weight):
+            selected.append(name)
+    return selected
+
+
+def select_fields(metadata, names):
+    """
+    Copy of the metadata with the fields of names only (the metadata is not changed).
+    """
+    names = set(names)
+    selected = copy.copy(metadata)
+    selected["resources"] = [copy.copy(resource) for resource in metadata["resources"]]
+    for resource in selected["resources"]:
+        schema = copy.copy(resource["schema"])
+        schema["fields"] = [
+            field for field in schema["fields"] if field["name"] in names
+        ]
+        resource["schema"] = schema
+    return selected
@@ -0,0 +1,153 @@
+import logging
+
+import numpy as np
+from scipy.stats import gaussian_kde
+
+logger = logging.getLogger(__name__)
+
+DENSITY_MODES = ("kde", "histogram", "exact")
+
+# number of grid points used for linear binning in the binned kde
+MIN_BINS = 1024
+MAX_BINS = 2**16
+
+
+def scott_bandwidth(values, counts=None):
+    """
+    Bandwidth of scipy.stats.gaussian_kde with Scott's rule for 1-d data.
+
+    counts: number of occurrences of every value (all 1 if None)
+
+    Returns None if no kde can be estimated (less than two values or no variance).
+    """
+    if counts is None:
+        n = values.size
+        if n < 2:
+            return None
+        std = values.std(ddof=1)
+    else:
+        n = counts.sum()
+        if n < 2:
+            return None
+        mean = np.dot(counts, values) / n
+        std = np.sqrt(np.dot(counts, (values - mean) ** 2) / (n - 1))
+    return moments_bandwidth(n, std)
+
+
+def moments_bandwidth(n, std):
+    """
+    Scott's bandwidth from the number of values and their standard deviation (ddof=1).
+    """
+    if n < 2 or not np.isfinite(std) or std <= 0:
+        return None
+    return std * n ** (-1.0 / 5)
+
+
+def kde_bins(low, high, bandwidth):
+    """
+    Number of grid points of the binned kde.
+    """
+    return int(np.clip(16 * (high - low) / bandwidth, MIN_BINS, MAX_BINS))
+
+
+def linear_binning(values, low, high, num_bins, counts=None):
+    """
+    Distribute every value onto its two neighbouring grid points.
+
+    Returns the grid and the (fractional) counts per grid point.
+    Counts of several calls with the same grid can be added.
+    """
+    if counts is None:
+        counts = np.ones(values.size)
+    grid = np.linspace(low, high, num_bins)
+    delta = (high - low) / (num_bins - 1)
+    position = (values - low) / delta
+    lower = np.clip(np.floor(position).astype(np.int64), 0, num_bins - 2)
+    upper_weight = position - lower
+    binned = np.bincount(lower, weights=counts * (1 - upper_weight), minlength=num_bins)
+    binned += np.bincount(lower + 1, weights=counts * upper_weight, minlength=num_bins)
+    return grid, binned
+
+
+def binned_kde(values, points, bandwidth=None, counts=None):
+    """
+    Gaussian kde evaluated at points, computed on a linearly binned grid.
+
+    Gives the same result as scipy.stats.gaussian_kde(values).evaluate(points)
+    up to the binning error, but costs O(n + bins * points) instead of O(n * points).
+    counts: number of occurrences of every value (all 1 if None)
+    """
+    if bandwidth is None:
+        bandwidth = scott_bandwidth(values, counts)
+    n = values.size if counts is None else counts.sum()
+    low = values.min()
+    high = values.max()
+    grid, binned = linear_binning(
+        values, low, high, kde_bins(low, high, bandwidth), counts
+    )
+    occupied = binned > 0
+    grid = grid[occupied]
+    binned = binned[occupied]
+    density = np.empty(len(points))
+    for i, point in enumerate(points):
+        z = (point - grid) / bandwidth
+        density[i] = np.dot(binned, np.exp(-0.5 * z * z))
+    return density / (n * bandwidth * np.sqrt(2 * np.pi))
+
+
+def exact_kde(values, points, counts=None):
+    """
+    Reference implementation with scipy.stats.gaussian_kde.
+    """
+    if counts is not None:
+        values = np.repeat(values, np.rint(counts).astype(np.int64))
+    return gaussian_kde(values).evaluate(points)
+
+
+def histogram(values, points, counts=None):
+    """
+    Normalized histogram with one bin centered on every point.
+    """
+    by = points[1] - points[0]
+    edges = np.append(points - by / 2, points[-1] + by / 2)
+    binned, _ = np.histogram(values, bins=edges, weights=counts)
+    n = values.size if counts is None else counts.sum()
+    return binned / (n * by)
+
+
+def density(values, num_density_elements=20, mode="kde", counts=None, bandwidth=None):
+    """
+    Density of the valid values of a numeric variable.
+
+    Parameter:
+
+    values: valid values as float64 array (i.e. ColumnProfile.valid_floats)
+    num_density_elements: number of equidistant points between min and max
+    mode: "kde" (binned gaussian kde), "histogram" or "exact" (scipy gaussian kde)
+    counts: number of occurrences of every value (i.e. distinct values or grid points
+            of a linear binning); all 1 if None
+    bandwidth: bandwidth of the kde; Scott's rule on values if None
+
+    Returns density (list), min, max and by (distance between the points).
+    min and max are empty lists if there are no valid values,
+    density is empty and by is 0 if no density can be estimated.
+    """
+    if mode not in DENSITY_MODES:
+        raise ValueError("Unknown density mode %s" % mode)
+    if values.size == 0:
+        return [], [], [], 0
+    min_val = float(values.min())
+    max_val = float(values.max())
+    if bandwidth is None:
+        bandwidth = scott_bandwidth(values, counts)
+    if bandwidth is None:
+        return [], min_val, max_val, 0
+    points = np.linspace(min_val, max_val, num_density_elements)
+    by = float(points[1] - points[0])
+    if mode == "kde":
+        density_temp = binned_kde(values, points, bandwidth, counts)
+    elif mode == "histogram":
+        density_temp = histogram(values, points, counts)
+    else:
+        density_temp = exact_kde(values, points, counts)
+    return density_temp.tolist(), min_val, max_val, by
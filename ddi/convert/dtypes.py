@@ -0,0 +1,60 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# strings are stored as categories if at most this share of the values is distinct
+MAX_DISTINCT_SHARE = 0.5
+
+
+def compact_column(column, scale=None):
+    """
+    Column with the smallest dtype which keeps all values (and all statistics).
+
+    Integers are downcast to the smallest integer type. Strings are stored as
+    categories if they repeat (scale: type of the variable in the metadata,
+    only "string" variables and variables without metadata are changed).
+    Floats are kept: the statistics of float32 differ from float64.
+    """
+    if column.dtype.kind == "i":
+        return pd.to_numeric(column, downcast="integer")
+    if column.dtype != object or scale not in (None, "string"):
+        return column
+    if pd.api.types.infer_dtype(column, skipna=True) != "string":
+        return column
+    if column.nunique() > MAX_DISTINCT_SHARE * len(column):
+        return column
+    return column.astype("category")
+
+
+def compact_dtypes(data, fields=None):
+    """
+    Data with compact dtypes (see compact_column) and the memory before and after.
+
+    Parameter:
+
+    data: DataFrame (i.e. from read_stata or read_tdp)
+    fields: fields of the metadata (for the types of the variables)
+
+    Returns the data and the memory usage in bytes before and after.
+
+    Example:
+
+        d, (before, after) = compact_dtypes(d, m["resources"][0]["schema"]["fields"])
+    """
+    scales = dict()
+    for elem in fields or []:
+        scales[elem["name"]] = elem.get("type")
+    before = int(data.memory_usage(deep=True).sum())
+    compact = pd.DataFrame(
+        {name: compact_column(data[name], scales.get(name)) for name in data.columns},
+        index=data.index,
+        columns=data.columns,
+    )
+    after = int(compact.memory_usage(deep=True).sum())
+    logger.info(
+        "memory %.1f MB before and %.1f MB after compact dtypes"
+        % (before / 2**20, after / 2**20)
+    )
+    return compact, (before, after)
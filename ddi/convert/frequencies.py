@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+
+def label_codes(column, values):
+    """
+    Code every row of column with the position of its value in the unique values.
+
+    Returns the row codes (-1 for missing values and values not in values),
+    the position of every entry of values in the unique values and the unique values.
+    """
+    value_codes, unique = pd.factorize(pd.Index(values))
+    unique = pd.Index(unique)
+    codes = unique.get_indexer(column)
+    return codes, value_codes, unique
+
+
+class CategoricalCodes:
+    """
+    Integer codes of a categorical variable, aligned with its value labels.
+
+    Every row holds the position of its value in the unique label values
+    (-1 for missing and unlabelled values) in the smallest integer dtype.
+    Frequencies for all consumers come from one bincount on the codes.
+
+    The codes belong to the column and the labels they were built from: check them
+    with matches before using them for a column which may have changed.
+
+    Example:
+
+        codes = CategoricalCodes(data["sex"], [1, 2, -1])
+        codes.frequencies()
+    """
+
+    def __init__(self, column, values):
+        self.values = list(values)
+        codes, self.value_codes, self.unique = label_codes(column, self.values)
+        self.n_unique = len(set(self.value_codes))
+        self.codes = codes.astype(np.min_scalar_type(-max(self.n_unique, 1)))
+        self.dtype = column.dtype
+        # rows with a value, but without a label
+        self.unlabelled = int(((codes < 0) & pd.notnull(column)).sum())
+
+    def __len__(self):
+        return len(self.codes)
+
+    def matches(self, column, values):
+        """
+        Whether the codes still fit column and the label values (i.e. after edits).
+
+        Labelled rows are decoded and compared with the column, the other rows must be
+        missing or unlabelled (one pass over the column, cheaper than new codes).
+        """
+        if list(values) != self.values or len(column) != len(self.codes):
+            return False
+        if column.dtype != self.dtype:
+            return False
+        labelled = self.codes >= 0
+        current = column.to_numpy()
+        if not pd.Index(current[labelled]).equals(
+            self.unique.take(self.codes[labelled])
+        ):
+            return False
+        rest = pd.Series(current[~labelled])
+        rest = rest[rest.notnull()]
+        return len(rest) == self.unlabelled and not rest.isin(self.values).any()
+
+    def frequencies(self, weights=None, groups=None, n_groups=1):
+        """
+        Frequencies of all values with one bincount.
+
+        Parameter:
+
+        weights: sum the weights instead of counting the rows (missing weights count 0)
+        groups: group code for every row (0 to n_groups-1, -1 to skip the row)
+        n_groups: number of groups
+
+        Returns an array with one row per group and one column per value.
+        """
+        valid = self.codes >= 0
+        if groups is None:
+            flat = self.codes[valid].astype(np.intp)
+        else:
+            valid &= groups >= 0
+            flat = groups[valid] * self.n_unique + self.codes[valid]
+        if weights is not None:
+            weights = np.nan_to_num(np.asarray(weights, dtype=np.float64)[valid])
+        counts = np.bincount(flat, weights=weights, minlength=n_groups * self.n_unique)
+        return counts.reshape(n_groups, self.n_unique)[:, self.value_codes]
+
+    def median(self):
+        """
+        Median of the values >= 0 from the frequencies (same result as np.median).
+
+        Returns None if there are unlabelled values or the values are not numeric.
+        """
+        if self.unlabelled or self.dtype.kind not in "iuf":
+            return None
+        # labels in their own dtype: labels without rows may not fit the column dtype
+        # (i.e. int8 from compact_dtypes), labels with rows always fit
+        values = pd.Index(self.values)
+        if values.dtype.kind not in "iuf":
+            return None
+        counts = self.frequencies()[0]
+        valid = (counts > 0) & (values >= 0)
+        values, counts = values[valid].to_numpy().astype(self.dtype), counts[valid]
+        order = np.argsort(values, kind="stable")
+        values, counts = values[order], counts[order]
+        n = counts.sum()
+        if n == 0:
+            return np.float64(np.nan)
+        positions = np.searchsorted(np.cumsum(counts), [(n - 1) // 2, n // 2], "right")
+        return np.median(values[positions])
+
+
+def encode_categoricals(data, fields):
+    """
+    CategoricalCodes of all categorical variables, aligned with fields[*].values.
+
+    Returns a dict with the codes per variable.
+    """
+    codes = dict()
+    for elem in fields:
+        if elem["type"] == "cat" and elem["name"] in data:
+            values = [value["value"] for value in elem["values"]]
+            codes[elem["name"]] = CategoricalCodes(data[elem["name"]], values)
+    return codes
+
+
+def missing_frequencies(values, weights=None):
+    """
+    Missing codes (negative values) in order of their first occurrence
+    and their (weighted) frequencies.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        negative = values < 0
+    codes, missing_values = pd.factorize(values[negative])
+    if weights is not None:
+        weights = np.nan_to_num(np.asarray(weights, dtype=np.float64)[negative])
+    counts = np.bincount(codes, weights=weights, minlength=len(missing_values))
+    return missing_values, counts
+
+
+def weighted_frequencies(data, fields, weight, codes=None):
+    """
+    Weighted frequencies of all variables in one sweep over the data.
+
+    The weight column is prepared once; every variable is coded and summed with one
+    bincount. Returns a dict with the weighted frequencies of the values
+    (categorical variables, in the order of the metadata) and of the missing codes
+    (numeric variables, in the order of missing_frequencies) per variable.
+    codes are the CategoricalCodes of the categorical variables (if already known).
+    """
+    if codes is None:
+        codes = dict()
+    weights = np.nan_to_num(data[weight].to_numpy(dtype=np.float64))
+    weighted = dict()
+    for elem in fields:
+        if elem["name"] not in data:
+            continue
+        if elem["type"] == "cat":
+            if elem["name"] not in codes:
+                values = [value["value"] for value in elem["values"]]
+                codes[elem["name"]] = CategoricalCodes(data[elem["name"]], values)
+            weighted[elem["name"]] = codes[elem["name"]].frequencies(weights)[0]
+        elif elem["type"] == "number" and elem["name"] != weight:
+            try:
+                column = pd.to_numeric(data[elem["name"]])
+            except (ValueError, TypeError):
+                continue
+            weighted[elem["name"]] = missing_frequencies(column, weights)[1]
+    return weighted
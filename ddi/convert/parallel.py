@@ -0,0 +1,125 @@
+import functools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# worker state, set once per process by _init_worker
+_worker = {}
+
+
+class SharedFrame:
+    """
+    Columns of a DataFrame in shared memory.
+
+    Numeric columns (numpy dtypes) are copied once into a shared memory block,
+    all other columns (i.e. strings and extension dtypes like Int64) are shared as
+    integer codes plus their unique values.
+    Only the spec (names of the blocks) is sent to the worker processes.
+
+    Example:
+
+        with SharedFrame(data) as shared:
+            data = attach_frame(shared.spec)
+    """
+
+    def __init__(self, data):
+        self.blocks = []
+        self.spec = []
+        for name in data.columns:
+            column = data[name]
+            # extension dtypes have kinds of numpy dtypes, but to_numpy gives objects
+            if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+                array = column.to_numpy()
+                uniques = None
+            else:
+                codes, uniques = pd.factorize(column)
+                if isinstance(column.dtype, np.dtype):
+                    uniques = np.asarray(uniques, dtype=object)
+                else:
+                    # the extension array: its take fills the missing values (-1)
+                    uniques = uniques.array
+                # codes in the dtype of Categorical, which keeps them without a copy
+                array = codes.astype(codes_dtype(len(uniques)))
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.spec.append((name, block.name, array.dtype.str, len(array), uniques))
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def codes_dtype(n_uniques):
+    """
+    Smallest integer dtype for the codes of n_uniques values (as pandas uses for Categorical).
+    """
+    for dtype in [np.int8, np.int16, np.int32]:
+        if n_uniques < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def attach_frame(spec):
+    """
+    Build a DataFrame from the shared memory blocks in spec without copying the columns.
+
+    Object columns become Categoricals on the shared codes, columns of extension
+    dtypes are rebuilt from their codes in their own dtype.
+
+    Returns the DataFrame and the attached blocks (which must outlive the DataFrame).
+    """
+    columns = {}
+    blocks = []
+    for name, block_name, dtype, length, uniques in spec:
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        array = np.ndarray(length, np.dtype(dtype), buffer=block.buf)
+        array.setflags(write=False)
+        if isinstance(uniques, np.ndarray):
+            array = pd.Categorical.from_codes(array, categories=uniques)
+        elif uniques is not None:
+            array = uniques.take(array, allow_fill=True)
+        columns[name] = array
+    return pd.DataFrame(columns, copy=False), blocks
+
+
+def _init_worker(spec, context):
+    _worker["data"], _worker["blocks"] = attach_frame(spec)
+    _worker["context"] = context
+
+
+def _call_worker(function, item):
+    return function(item, _worker["data"], _worker["context"])
+
+
+def parallel_map(function, items, data, context, jobs):
+    """
+    Apply function(item, data, context) to all items in a pool of jobs processes.
+
+    data is shared with the workers through shared memory, context is pickled once
+    per worker. Results are yielded in the order of items.
+    """
+    items = list(items)
+    chunksize = max(1, len(items) // (jobs * 4))
+    with SharedFrame(data) as shared:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(shared.spec, context)
+        ) as executor:
+            for result in executor.map(
+                functools.partial(_call_worker, function), items, chunksize=chunksize
+            ):
+                yield result
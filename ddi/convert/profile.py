@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from ddi.convert.frequencies import missing_frequencies
+
+
+class ColumnProfile:
+    """
+    Views of one column shared by all statistics of a variable.
+
+    Every view is computed on first use and kept for the lifetime of the profile.
+    Object columns are converted with pd.to_numeric once; the data is never changed.
+
+    Example:
+
+        profile = ColumnProfile(data["inc"])
+        profile.sorted_valid
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.size = int(column.size)
+        # category keys, labels and row codes if the column splits the data
+        self.categories = None
+        # row positions of every category (see write_stats.group_slices)
+        self.slices = None
+        self._null_count = None
+        self._values = None
+        self._floats = None
+        self._valid_mask = None
+        self._valid = None
+        self._sorted_valid = None
+        self._missings = None
+
+    @property
+    def null_count(self):
+        if self._null_count is None:
+            self._null_count = int(self.column.isnull().sum())
+        return self._null_count
+
+    @property
+    def values(self):
+        """Numeric values in their original dtype."""
+        if self._values is None:
+            values = self.column.to_numpy()
+            if values.dtype == object:
+                values = pd.to_numeric(self.column).to_numpy()
+            self._values = values
+        return self._values
+
+    @property
+    def floats(self):
+        """Numeric values as float64."""
+        if self._floats is None:
+            self._floats = np.asarray(self.values, dtype=np.float64)
+        return self._floats
+
+    @property
+    def valid_mask(self):
+        """Rows with a valid value (>= 0)."""
+        if self._valid_mask is None:
+            with np.errstate(invalid="ignore"):
+                self._valid_mask = self.values >= 0
+        return self._valid_mask
+
+    @property
+    def valid(self):
+        """Valid values in their original dtype and order."""
+        if self._valid is None:
+            self._valid = self.values[self.valid_mask]
+        return self._valid
+
+    @property
+    def valid_floats(self):
+        """Valid values as float64 (not kept)."""
+        return np.asarray(self.valid, dtype=np.float64)
+
+    @property
+    def n_nan(self):
+        """Missing values after the conversion to numbers."""
+        return int(np.count_nonzero(np.isnan(self.floats)))
+
+    @property
+    def n_valid(self):
+        return int(np.count_nonzero(self.valid_mask))
+
+    @property
+    def sorted_valid(self):
+        if self._sorted_valid is None:
+            self._sorted_valid = np.sort(self.valid)
+        return self._sorted_valid
+
+    @property
+    def missings(self):
+        """Missing codes in order of their first occurrence and their frequencies."""
+        if self._missings is None:
+            self._missings = missing_frequencies(self.floats)
+        return self._missings
+
+
+def column_profile(data, name, profiles=None):
+    """
+    Profile of data[name], kept in the dict profiles if given.
+    """
+    if profiles is None:
+        return ColumnProfile(data[name])
+    if name not in profiles:
+        profiles[name] = ColumnProfile(data[name])
+    return profiles[name]
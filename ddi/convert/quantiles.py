@@ -0,0 +1,82 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from ddi.convert.profile import ColumnProfile
+
+SUMMARY_NAMES = [
+    "Min.",
+    "1st Qu.",
+    "Median",
+    "Mean",
+    "3rd Qu.",
+    "Max.",
+    "Valid",
+    "Invalid",
+]
+
+
+def sorted_median(sorted_values):
+    """
+    Median of sorted values, same result and dtype as np.median(sorted_values).
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return np.float64(np.nan)
+    return np.median(sorted_values[(n - 1) // 2 : n // 2 + 1])
+
+
+def quartiles(sorted_values):
+    """
+    First and third quartile as median of the lower and the upper half.
+
+    The middle value of an odd number of values belongs to no half.
+    Both halves are medians of float64 values.
+    """
+    n = len(sorted_values)
+    mid = n // 2
+    lower = sorted_values[:mid]
+    if n % 2 == 0:
+        upper = sorted_values[mid:]
+    else:
+        upper = sorted_values[mid + 1 :]
+    return (
+        sorted_median(lower.astype(np.float64)),
+        sorted_median(upper.astype(np.float64)),
+    )
+
+
+def mean(values):
+    """
+    Mean like pandas: float values keep their dtype, all others are summed as float64.
+    """
+    if values.dtype.kind == "f":
+        return values.sum(dtype=values.dtype) / values.dtype.type(len(values))
+    return values.sum(dtype=np.float64) / len(values)
+
+
+def summary(column, profile=None):
+    """
+    Min, quartiles, mean, max, valid and invalid cases of a numeric column at once.
+
+    The valid values are sorted only once (and kept in the ColumnProfile profile).
+    Returns an OrderedDict with the SUMMARY_NAMES as keys.
+    """
+    if profile is None:
+        profile = ColumnProfile(column)
+    values = profile.valid
+    sorted_values = profile.sorted_valid
+    first_q, third_q = quartiles(sorted_values)
+    invalid = profile.n_nan
+    return OrderedDict(
+        [
+            ("Min.", sorted_values[0].item()),
+            ("1st Qu.", first_q),
+            ("Median", sorted_median(sorted_values)),
+            ("Mean", mean(values)),
+            ("3rd Qu.", third_q),
+            ("Max.", sorted_values[-1].item()),
+            ("Valid", profile.size - invalid),
+            ("Invalid", invalid),
+        ]
+    )
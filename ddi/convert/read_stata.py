@@ -1,13 +1,22 @@
 import logging
 import re
+from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
 
+from ddi.convert.columns import select_columns
+from ddi.missings import read_missings
+
 logger = logging.getLogger(__name__)
 
+# display formats of dates, converted to datetime64 by pandas
+STATA_DATE_FORMATS = ("%tc", "%tC", "%td", "%d", "%tw", "%tm", "%tq", "%th", "%ty")
+
 
-def cat_values(var, varscale, df_data, data):
+def cat_values(var, varscale, df_data, data, label_dict=None):
+    # label_dict: value labels of all label sets (data.value_labels()),
+    #             read once for all variables by generate_tdp
 
     cat_dict = []
 
@@ -17,18 +26,10 @@ def cat_values(var, varscale, df_data, data):
     2^32-2 = 4294967294 == [-2] trifft nicht zu
     2^32-1 = 4294967295 == [-1] keine Angabe
     """
-    df_nomis = df_data[var].copy()
-
-    for index, value in enumerate(df_nomis):
-        if isinstance(value, str) == False and value < 0:
-            df_nomis[index] = np.nan
-
-    label_dict = data.value_labels()
+    if label_dict is None:
+        label_dict = data.value_labels()
 
-    for sn, label in enumerate(data.lbllist):
-        if label == varscale["name"]:
-            value_list = label
-            value_labels = label_dict[label]
+    value_labels = label_dict[varscale["name"]]
 
     for v, l in value_labels.items():
         cat_dict.append(dict(value=int(v), label=l))
@@ -55,11 +56,14 @@ def generate_tdp(vars, varlabels, varscale, dta_file, df_data, data):
     tdp = {}
     fields = []
 
+    # every call builds a new dict: read all label sets once
+    label_dict = data.value_labels()
+
     for var, varscale in zip(vars, varscale):
         scale = scale_var(var, varscale, df_data)
         meta = dict(name=var, label=varlabels[var], type=scale)
         if scale == "cat":
-            meta["values"] = cat_values(var, varscale, df_data, data)
+            meta["values"] = cat_values(var, varscale, df_data, data, label_dict)
 
         fields.append(meta)
 
@@ -76,10 +80,34 @@ def generate_tdp(vars, varlabels, varscale, dta_file, df_data, data):
     return tdp
 
 
-def parse_dataset(data, stata_name):
+def header_frame(data, columns=None):
+    """
+    DataFrame without rows, with the columns and dtypes of data.read().
 
-    # transform StataReader Object
-    d = data.read()
+    Only the header of the Stata file is used (no rows are read).
+    """
+    frame = OrderedDict()
+    for name, dtype, typ, fmt in zip(
+        data.varlist, data.dtyplist, data.typlist, data.fmtlist
+    ):
+        if columns is not None and name not in columns:
+            continue
+        if fmt.startswith(STATA_DATE_FORMATS):
+            dtype = "datetime64[ns]"
+        elif typ == "Q" or not isinstance(dtype, np.dtype):
+            # strL (stored as references, type "Q") and str
+            dtype = object
+        frame[name] = pd.Series(dtype=dtype)
+    return pd.DataFrame(frame, columns=list(frame))
+
+
+def parse_dataset(
+    data, stata_name, nrows=None, columns=None, metadata_only=False, missings=None
+):
+    # columns: names of the variables to read (all if None)
+    # metadata_only: no rows are read, the data is empty (header_frame)
+    # missings: dict, filled with the codes of the extended missing values
+    #           (split_missings, in chunks by read_missings), the data stays numeric
 
     # vars = [dict(name=var, sn=sn) for sn, var in enumerate(data.varlist) ]
     vars = data.varlist
@@ -91,14 +119,106 @@ def parse_dataset(data, stata_name):
     varscale = [dict(name=varscale, sn=sn) for sn, varscale in enumerate(data.lbllist)]
     # varvalues = data.value_labels()
 
+    # transform StataReader Object (nrows: only the first rows)
+    if metadata_only:
+        d = header_frame(data, columns)
+    elif missings is not None:
+        d, codes = read_missings(data, nrows, columns)
+        missings.update(codes)
+    else:
+        d = data.read(nrows, columns=columns)
+    if columns is not None:
+        varscale = [scale for var, scale in zip(vars, varscale) if var in columns]
+        vars = [var for var in vars if var in columns]
+
     dta_file = re.search("^.*\/(.*)", stata_name).group(1)
     m = generate_tdp(vars, varlabels, varscale, dta_file, d, data)
 
     return d, m
 
 
-def read_stata(stata_name):
+class StataChunks:
+    """
+    Rows of a Stata file in chunks of chunksize rows.
+
+    Every iteration reads the file again with the pandas iterator,
+    so the file is never loaded at once.
+
+    Example:
+
+        for chunk in StataChunks("../input/dataset.dta", 100000):
+            print(len(chunk))
+    """
+
+    def __init__(self, stata_name, chunksize=100000, columns=None):
+        self.stata_name = stata_name
+        self.chunksize = chunksize
+        # names of the variables to read (all if None)
+        self.columns = columns
+
+    def __iter__(self):
+        with pd.read_stata(
+            self.stata_name,
+            convert_categoricals=False,
+            chunksize=self.chunksize,
+            columns=self.columns,
+        ) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def read_stata(stata_name, chunksize=None, columns=None, split="", weight=""):
+    # columns: names of the variables to read (all if None),
+    #          the split and weight variables are always read (select_columns)
     logger.info('read "' + stata_name + '"')
-    data = pd.read_stata(stata_name, iterator=True, convert_categoricals=False)
-    d, m = parse_dataset(data, stata_name)
-    return d, m
+    with pd.read_stata(stata_name, iterator=True, convert_categoricals=False) as data:
+        if columns is not None:
+            columns = select_columns(data.varlist, columns, split, weight)
+        if chunksize is None:
+            d, m = parse_dataset(data, stata_name, columns=columns)
+            return d, m
+        # the data is read by write_stats, the metadata only from the header
+        # (as read_stata_metadata)
+        _, m = parse_dataset(data, stata_name, columns=columns, metadata_only=True)
+    return StataChunks(stata_name, chunksize, columns), m
+
+
+def read_stata_missings(stata_name, columns=None, split="", weight=""):
+    """
+    Data and TDP metadata of a Stata file (as read_stata) with the extended missings.
+
+    The data is numeric (all missing values are NaN), the extended missing values
+    (., .a to .z) are kept as int8 codes per variable (see ddi.missings).
+    The file is read in chunks (read_missings), so the StataMissingValue objects
+    of the missing values never exist for the whole file.
+
+    Example:
+
+        d, m, missings = read_stata_missings("../input/dataset.dta")
+        count_missings(missings["inc"][0])
+    """
+    logger.info('read "' + stata_name + '"')
+    missings = dict()
+    with pd.read_stata(stata_name, iterator=True, convert_categoricals=False) as data:
+        if columns is not None:
+            columns = select_columns(data.varlist, columns, split, weight)
+        d, m = parse_dataset(data, stata_name, columns=columns, missings=missings)
+    return d, m, missings
+
+
+def read_stata_metadata(stata_name, columns=None, split="", weight=""):
+    """
+    TDP metadata of a Stata file (as read_stata) without reading the data.
+
+    Only the header, the variable labels and the value labels are parsed.
+
+    Example:
+
+        m = read_stata_metadata("../input/dataset.dta")
+    """
+    logger.info('read metadata of "' + stata_name + '"')
+    with pd.read_stata(stata_name, iterator=True, convert_categoricals=False) as data:
+        if columns is not None:
+            columns = select_columns(data.varlist, columns, split, weight)
+        _, m = parse_dataset(data, stata_name, columns=columns, metadata_only=True)
+    return m
@@ -1,21 +1,61 @@
 import json
 import logging
+from string import ascii_lowercase
 
-import numpy as np
 import pandas as pd
 
+from ddi.convert.columns import select_columns, select_fields
+
 logger = logging.getLogger(__name__)
 
+# stata missings (. and .a to .z) in csv exports
+STATA_MISSINGS = ["."] + ["." + letter for letter in ascii_lowercase]
+
+# dtypes of the tdp types; "number" and "cat" do not tell integers from floats,
+# so the parser keeps its choice of int64 or float64 for them
+TDP_DTYPES = dict(string=object)
+
+
+def tdp_dtypes(fields):
+    """
+    Dtypes of the fields for pd.read_csv, from the types of the tdp schema.
+    """
+    dtypes = dict()
+    for elem in fields:
+        if elem.get("type") in TDP_DTYPES:
+            dtypes[elem["name"]] = TDP_DTYPES[elem["type"]]
+    return dtypes
+
 
-def read_tdp(csv_file_name, json_file_name):
+def read_tdp(
+    csv_file_name,
+    json_file_name,
+    columns=None,
+    split="",
+    weight="",
+    engine="c",
+):
+    # columns: names of the variables to read (all if None),
+    #          the split and weight variables are always read (select_columns)
+    # engine: parser of pd.read_csv, "pyarrow" reads with several threads
     logger.info('read "' + csv_file_name + '" and "' + json_file_name + '"')
-    d = pd.read_csv(csv_file_name, index_col=None)
-    # replace all stata missings (. and .a etc.) with NaN
-    try:
-        d = d.replace({"^\.\D?$": np.nan}, regex=True)
-    except:
-        pass
     with open(json_file_name) as json_file:
         metadata = json_file.read()
     m = json.loads(metadata)
+    usecols = None
+    if columns is not None:
+        names = [elem["name"] for elem in m["resources"][0]["schema"]["fields"]]
+        selected = set(select_columns(names, columns, split, weight))
+        m = select_fields(m, selected)
+        header = pd.read_csv(csv_file_name, index_col=None, nrows=0).columns
+        usecols = [name for name in header if name in selected]
+    # the parser replaces all stata missings (. and .a etc.) with NaN
+    d = pd.read_csv(
+        csv_file_name,
+        index_col=None,
+        usecols=usecols,
+        dtype=tdp_dtypes(m["resources"][0]["schema"]["fields"]),
+        na_values=STATA_MISSINGS,
+        engine=engine,
+    )
     return d, m
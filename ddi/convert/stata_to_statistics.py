@@ -3,52 +3,106 @@ import os
 import sys
 
 import pandas as pd
+from ddi.convert.cache import StatsCache
+from ddi.convert.columnar import read_columnar_metadata
+from ddi.convert.read_stata import read_stata_metadata
 from ddi.dataset import Dataset
 
 logger = logging.getLogger(__name__)
 
 sys.path.append(os.path.abspath("../../../ddi.py"))
 
+# file extension, Dataset method and metadata reader of every input format
+INPUT_FORMATS = dict(
+    stata=(".dta", "read_stata", read_stata_metadata),
+    columnar=("", "read_columnar", read_columnar_metadata),
+)
 
-def stata_to_statistics(
-    study_name, input_csv, input_path, output_path, input_path_de=""
-):
+# columns of the input csv, one row per dataset
+DATASET_COLUMNS = ("filename", "weight", "split", "analysis_unit", "period", "sub_type")
+
+
+def dataset_rows(input_csv):
+    """
+    Rows of the input csv as dicts with the DATASET_COLUMNS.
+    """
     filereader = pd.read_csv(input_csv, delimiter=",", header=0)
+    return [
+        dict(zip(DATASET_COLUMNS, row))
+        for row in zip(*[filereader[column] for column in DATASET_COLUMNS])
+    ]
+
+
+def dataset_to_statistics(
+    study_name,
+    row,
+    input_path,
+    output_path,
+    input_path_de="",
+    cache=None,
+    input_format="stata",
+):
+    """
+    Write the statistics of one dataset (a row of the input csv, see dataset_rows).
+
+    Returns the name of the statistics file or None if an input file is missing.
+    """
+    extension, read_method, read_metadata = INPUT_FORMATS[input_format]
+    data = row["filename"]
 
-    for data, weight, split, analysis_unit, period, sub_type in zip(
-        filereader.filename,
-        filereader.weight,
-        filereader.split,
-        filereader.analysis_unit,
-        filereader.period,
-        filereader.sub_type,
-    ):
-        d1 = Dataset()
+    # the german metadata first: without it, the data is not read at all
+    metadata_de = ""
+    if input_path_de != "":
         try:
-            d1.read_stata(input_path + data + ".dta")
+            metadata_de = read_metadata(input_path_de + data + extension)
         except:
-            logger.warning("Unable to find " + data + ".dta in " + input_path + ".")
-            continue
-
-        metadata_de = ""
-        if input_path_de != "":
-            d2 = Dataset()
-            try:
-                d2.read_stata(input_path_de + data + ".dta")
-                metadata_de = d2.metadata
-            except:
-                logger.warning(
-                    "Unable to find " + data + ".dta in " + input_path_de + "."
-                )
-                continue
-
-        d1.write_stats(
-            output_path + data + "_stats.json",
-            split=split,
-            weight=weight,
-            analysis_unit=analysis_unit,
-            period=period,
-            sub_type=sub_type,
-            study=study_name,
-            metadata_de=metadata_de,
+            logger.warning(
+                "Unable to find " + data + extension + " in " + input_path_de + "."
+            )
+            return None
+
+    d1 = Dataset()
+    try:
+        getattr(d1, read_method)(input_path + data + extension)
+    except:
+        logger.warning("Unable to find " + data + extension + " in " + input_path + ".")
+        return None
+
+    output_name = output_path + data + "_stats.json"
+    d1.write_stats(
+        output_name,
+        split=row["split"],
+        weight=row["weight"],
+        analysis_unit=row["analysis_unit"],
+        period=row["period"],
+        sub_type=row["sub_type"],
+        study=study_name,
+        metadata_de=metadata_de,
+        cache=cache,
+    )
+    return output_name
+
+
+def stata_to_statistics(
+    study_name,
+    input_csv,
+    input_path,
+    output_path,
+    input_path_de="",
+    cache_path="",
+    cache_size=2**30,
+    input_format="stata",
+):
+    # input_format: "stata" (input_path + filename + ".dta") or
+    #               "columnar" (directories of Dataset.write_columnar)
+    # input_path_de: only the labels are read from the german files (no rows)
+
+    # statistics of unchanged variables are reused from the cache
+    cache = None
+    if cache_path != "":
+        cache = StatsCache(cache_path, cache_size)
+
+    for row in dataset_rows(input_csv):
+        dataset_to_statistics(
+            study_name, row, input_path, output_path, input_path_de, cache, input_format
         )
@@ -3,14 +3,33 @@ import logging
 import math
 import os
 import re
-from collections import Counter, OrderedDict
+import textwrap
+from collections import OrderedDict
 
 import yaml
 from jinja2 import Template
 
 import numpy as np
 import pandas as pd
-from scipy.stats import gaussian_kde
+
+from ddi.convert.accumulators import (
+    CategoricalAccumulator,
+    NumberAccumulator,
+    StringAccumulator,
+)
+from ddi.convert.cache import fingerprint
+from ddi.convert.density import density as calculate_density
+from ddi.convert.frequencies import (
+    CategoricalCodes,
+    label_codes,
+    missing_frequencies,
+    weighted_frequencies,
+)
+from ddi.convert.parallel import parallel_map
+from ddi.convert.profile import ColumnProfile, column_profile
+from ddi.convert.quantiles import sorted_median, summary
+from ddi.convert.read_stata import StataChunks
+from ddi.missings import count_missings
 
 logger = logging.getLogger(__name__)
 
@@ -23,42 +42,26 @@ templatepath_md = cur_dir + "/convert/template_stats_md.md"
 template_stats_md = open(templatepath_md).read()
 
 
-def uni_cat(elem, elem_de, file_csv, var_weight):
+def cat_dict(elem, elem_de, frequencies, weighted=None):
 
-    frequencies = []
     values = []
     missings = []
     labels = []
 
     if elem_de != "":
         labels_de = []
-
-        value_count = file_csv[elem["name"]].value_counts()
-        for i, (value, value_de) in enumerate(zip(elem["values"], elem_de["values"])):
-            try:
-                frequencies.append(int(value_count[value["value"]]))
-            except:
-                frequencies.append(0)
-            labels.append(value["label"])
-            labels_de.append(value_de["label"])
-            if value["value"] >= 0:
-                missings.append("False")
-            else:
-                missings.append("True")
-            values.append(value["value"])
+        elements = zip(elem["values"], elem_de["values"])
     else:
-        value_count = file_csv[elem["name"]].value_counts()
-        for i, value in enumerate(elem["values"]):
-            try:
-                frequencies.append(int(value_count[value["value"]]))
-            except:
-                frequencies.append(0)
-            labels.append(value["label"])
-            if value["value"] >= 0:
-                missings.append("False")
-            else:
-                missings.append("True")
-            values.append(value["value"])
+        elements = ((value, "") for value in elem["values"])
+    for value, value_de in elements:
+        labels.append(value["label"])
+        if elem_de != "":
+            labels_de.append(value_de["label"])
+        if value["value"] >= 0:
+            missings.append("False")
+        else:
+            missings.append("True")
+        values.append(value["value"])
     """
     missing_count = sum(i<0 for i in file_csv[elem["name"]])
     logger.info(elem["name"])
@@ -66,7 +69,7 @@ def uni_cat(elem, elem_de, file_csv, var_weight):
 
     cat_dict = OrderedDict(
         [
-            ("frequencies", frequencies),
+            ("frequencies", [int(f) for f in frequencies[: len(values)]]),
             ("values", values),
             ("missings", missings),
             ("labels", labels),
@@ -76,40 +79,60 @@ def uni_cat(elem, elem_de, file_csv, var_weight):
         cat_dict["labels_de"] = labels_de
 
     # weighted
-    weighted = []
-    if var_weight != "":
-        f_w = file_csv.pivot_table(
-            index=elem["name"], values=var_weight, aggfunc=np.sum
-        )
-        for index, value in enumerate(elem["values"]):
-            try:
-                weighted.append(int(f_w[value["value"]]))
-            except:
-                weighted.append(0)
-        cat_dict["weighted"] = weighted
+    if weighted is not None:
+        cat_dict["weighted"] = [int(w) for w in weighted[: len(values)]]
 
     return cat_dict
 
 
+def uni_cat(
+    elem, elem_de, file_csv, var_weight, weighted=None, codes=None, profiles=None
+):
+    # weighted: precomputed weighted frequencies of all variables (weighted_frequencies)
+    # codes: CategoricalCodes of the variable (encode_categoricals)
+    # profiles: ColumnProfiles of the variables (column_profile)
+
+    if codes is None:
+        values = [value["value"] for value in elem["values"]]
+        codes = CategoricalCodes(file_csv[elem["name"]], values)
+    frequencies = codes.frequencies()[0]
+
+    weighted_values = None
+    if var_weight != "" and weighted is not None and elem["name"] in weighted:
+        weighted_values = weighted[elem["name"]]
+    elif var_weight != "":
+        weights = column_profile(file_csv, var_weight, profiles).floats
+        weighted_values = codes.frequencies(weights)[0]
+
+    return cat_dict(elem, elem_de, frequencies, weighted_values)
+
+
+STRING_MISSINGS = ["-1", "-2", "-3", "nan"]
+
+
+def string_missing(value):
+    for code in STRING_MISSINGS:
+        if code in str(value):
+            return True
+    return False
+
+
+def string_missing_mask(values):
+    """
+    string_missing for an array of values in one vectorized pass.
+    """
+    text = pd.Series(values, dtype=object).astype(str)
+    return text.str.contains("|".join(STRING_MISSINGS)).to_numpy(dtype=bool)
+
+
 def uni_string(elem, file_csv):
     frequencies = []
     missings = []
 
-    len_unique = len(file_csv[elem["name"]].unique())
-    len_missing = 0
-    for i in file_csv[elem["name"]].unique():
-        if "-1" in str(i):
-            len_unique -= 1
-            len_missing += 1
-        elif "-2" in str(i):
-            len_unique -= 1
-            len_missing += 1
-        elif "-3" in str(i):
-            len_unique -= 1
-            len_missing += 1
-        elif "nan" in str(i):
-            len_unique -= 1
-            len_missing += 1
+    # one hash pass for the distinct values, missing codes only on those
+    unique = pd.unique(file_csv[elem["name"]])
+    len_missing = int(string_missing_mask(unique).sum())
+    len_unique = len(unique) - len_missing
     frequencies.append(len_unique)
     missings.append(len_missing)
 
@@ -118,94 +141,58 @@ def uni_string(elem, file_csv):
     return string_dict
 
 
-def uni_number(elem, file_csv, var_weight, num_density_elements=20):
-    if (
-        file_csv[elem["name"]].dtype == "object"
-        or file_csv[elem["name"]].dtype == "object"
-    ):
-        file_csv[elem["name"]] = pd.to_numeric(file_csv[elem["name"]])
+def number_dict(
+    profile,
+    weights=None,
+    num_density_elements=20,
+    density_mode="kde",
+    weighted_missings=None,
+):
+    # profile: ColumnProfile of the values
+    # weighted_missings: precomputed weighted frequencies of the missing codes
 
-    # missings
-    missings = OrderedDict([("frequencies", []), ("labels", []), ("values", [])])
+    # min, max and density
+    density = calculate_density(
+        profile.valid_floats, num_density_elements, density_mode
+    )
 
-    density = []
-    total = []
-    valid = []
-    missing = []
+    # missings (in order of their first occurrence)
+    missing_values, counts = profile.missings
 
-    # min and max
-    try:
-        min_val = min(i for i in file_csv[elem["name"]] if i >= 0).astype(np.float64)
-        max_val = max(i for i in file_csv[elem["name"]] if i >= 0).astype(np.float64)
-
-        # density
-        temp_array = []
-        for num in file_csv[elem["name"]]:
-            if num >= 0:
-                temp_array.append(float(num))
-        density_range = np.linspace(min_val, max_val, num_density_elements)
-        try:
-            density_temp = gaussian_kde(sorted(temp_array)).evaluate(density_range)
-            by = float(density_range[1] - density_range[0])
-            density = density_temp.tolist()
-        except:
-            by = 0
-            density = []
-
-        # tranform to percentage
-        """
-        x = sum(density)
-        for i, c in enumerate(density):
-            density[i] = density[i]/x
-        """
+    # weighted missings
+    if weights is not None and weighted_missings is None:
+        weighted_missings = missing_frequencies(profile.floats, weights)[1]
+
+    # total and valid
+    total = profile.size
+    valid = total - profile.n_nan
+
+    return format_number_dict(
+        density, total, valid, missing_values, counts, weighted_missings
+    )
 
-    except:
-        min_val = []
-        max_val = []
-        by = 0
-        density = []
+
+def format_number_dict(
+    density, total, valid, missing_values, counts, weighted_missings=None
+):
+    # density: result of density (density, min, max and by)
+    # missing_values, counts: missing codes and their frequencies (missing_frequencies)
 
     # missings
-    for i in file_csv[elem["name"]].unique():
-        if i < 0:
-            missings["frequencies"].append(
-                file_csv[elem["name"]].value_counts()[i].astype(np.float64)
-            )
-            missings["values"].append(float(i))
-            # missings["labels"].append.... # there are no labels for missings in numeric variables
+    missings = OrderedDict([("frequencies", []), ("labels", []), ("values", [])])
+    missing = []
+
+    density, min_val, max_val, by = density
+
+    missings["frequencies"] = counts.astype(np.float64).tolist()
+    missings["values"] = missing_values.astype(np.float64).tolist()
+    # there are no labels for missings in numeric variables
     missing.append(sum(missings["frequencies"]))
 
-    if var_weight != "" and elem["name"] != var_weight:
+    if weighted_missings is not None:
         weighted = []
         # weighted densities: difficult to calculate the weighted value f.e. wave with pivot
-        """
-        try:
-            f_w = file_csv.pivot_table(index=elem["name"], values=var_weight, aggfunc=np.sum)
-            temp_array = []
-            for num in f_w:
-                if num>=0:
-                    temp_array.append(float(num))
-            density_temp = gaussian_kde(sorted(temp_array)).evaluate(density_range)
-            weighted = density_temp.tolist()
-        except:
-            weighted = []
-        """
-
-        # weighted missings
-        missings["weighted"] = []
-        f_w = file_csv.pivot_table(
-            index=elem["name"], values=var_weight, aggfunc=np.sum
-        )
-
-        for i in missings["values"]:
-            try:
-                missings["weighted"].append(int(f_w[i]))
-            except:
-                missings["weighted"].append(0)
-
-    # total and valid
-    total = int(file_csv[elem["name"]].size)
-    valid = total - int(file_csv[elem["name"]].isnull().sum())
+        missings["weighted"] = [int(w) for w in weighted_missings]
 
     number_dict = OrderedDict(
         [
@@ -220,24 +207,52 @@ def uni_number(elem, file_csv, var_weight, num_density_elements=20):
         ]
     )
 
-    if var_weight != "" and elem["name"] != var_weight:
+    if weighted_missings is not None:
         number_dict["weighted"] = weighted
 
     return number_dict
 
 
-def stats_cat(elem, file_csv):
+def uni_number(
+    elem,
+    file_csv,
+    var_weight,
+    num_density_elements=20,
+    density_mode="kde",
+    weighted=None,
+    profiles=None,
+):
+    # the profile converts object columns to numbers, file_csv is not changed
+    profile = column_profile(file_csv, elem["name"], profiles)
+    weights = None
+    weighted_missings = None
+    if var_weight != "" and elem["name"] != var_weight:
+        if weighted is not None and elem["name"] in weighted:
+            weighted_missings = weighted[elem["name"]]
+        else:
+            weights = column_profile(file_csv, var_weight, profiles).floats
 
-    data_wm = file_csv[file_csv[elem["name"]] >= 0][elem["name"]]
+    return number_dict(
+        profile, weights, num_density_elements, density_mode, weighted_missings
+    )
+
+
+def stats_cat(elem, file_csv, codes=None, profiles=None):
 
     names = ["Median", "Valid", "Invalid"]
     values = []
 
-    median = np.median(data_wm)
+    # the median comes from the frequencies if all values are labelled
+    profile = column_profile(file_csv, elem["name"], profiles)
+    median = None
+    if codes is not None:
+        median = codes.median()
+    if median is None:
+        median = sorted_median(profile.sorted_valid)
 
-    total = int(file_csv[elem["name"]].size)
-    valid = total - int(file_csv[elem["name"]].isnull().sum())
-    invalid = int(file_csv[elem["name"]].isnull().sum())
+    total = profile.size
+    valid = total - profile.null_count
+    invalid = profile.null_count
 
     value_names = [median, valid, invalid]
 
@@ -249,34 +264,14 @@ def stats_cat(elem, file_csv):
     return statistics
 
 
-def stats_number(elem, file_csv):
-
-    data_wm = file_csv[file_csv[elem["name"]] >= 0][elem["name"]]
-
-    names = ["Min.", "1st Qu.", "Median", "Mean", "3rd Qu.", "Max.", "Valid", "Invalid"]
-    values = []
-
-    min_val = min(data_wm)
-    max_val = max(data_wm)
-
-    median = np.median(data_wm)
-    mean = np.mean(data_wm)
-
-    mid = int(len(sorted(data_wm)) / 2)
-    first_q = np.median(sorted(data_wm)[:mid])
-    if len(sorted(data_wm)) % 2 == 0:
-        third_q = np.median(sorted(data_wm)[mid:])
-    else:
-        third_q = np.median(sorted(data_wm)[mid + 1 :])
+def stats_number(elem, file_csv, profiles=None):
 
-    total = int(file_csv[elem["name"]].size)
-    valid = total - int(file_csv[elem["name"]].isnull().sum())
-    invalid = int(file_csv[elem["name"]].isnull().sum())
+    # one sort for min, quartiles and max
+    profile = column_profile(file_csv, elem["name"], profiles)
+    number_summary = summary(file_csv[elem["name"]], profile)
 
-    value_names = [min_val, first_q, median, mean, third_q, max_val, valid, invalid]
-
-    for v in value_names:
-        values.append(str(v))
+    names = list(number_summary.keys())
+    values = [str(v) for v in number_summary.values()]
 
     statistics = OrderedDict([("names", names), ("values", values)])
 
@@ -299,13 +294,14 @@ def stats_string(elem, file_csv):
             data_wm.iloc[[index]] = ""
     """
 
-    total = int(file_csv[elem["name"]].size)
-    valid = int(file_csv[elem["name"]].value_counts().sum())
-    invalid = int(file_csv[elem["name"]].isnull().sum())
-    for i in file_csv[elem["name"]]:
-        if i == "" or i == ".":
-            valid = valid - 1
-            invalid = invalid + 1
+    column = file_csv[elem["name"]]
+    total = int(column.size)
+    invalid = int(column.isnull().sum())
+    valid = total - invalid
+    # empty strings and "." are invalid, too
+    empty = int(column.isin(["", "."]).sum())
+    valid = valid - empty
+    invalid = invalid + empty
 
     value_names = [valid, invalid]
 
@@ -317,11 +313,11 @@ def stats_string(elem, file_csv):
     return statistics
 
 
-def uni_statistics(elem, file_csv):
+def uni_statistics(elem, file_csv, codes=None, profiles=None):
 
     if elem["type"] == "cat":
 
-        statistics = stats_cat(elem, file_csv)
+        statistics = stats_cat(elem, file_csv, codes, profiles)
 
     elif elem["type"] == "string":
 
@@ -329,19 +325,30 @@ def uni_statistics(elem, file_csv):
 
     elif elem["type"] == "number":
 
-        statistics = stats_number(elem, file_csv)
+        statistics = stats_number(elem, file_csv, profiles)
 
     return statistics
 
 
-def uni(elem, elem_de, file_csv, var_weight):
+def uni(
+    elem,
+    elem_de,
+    file_csv,
+    var_weight,
+    density_mode="kde",
+    weighted=None,
+    codes=None,
+    profiles=None,
+):
 
     statistics = OrderedDict()
 
     # weight variable is just one variable
 
     if elem["type"] == "cat":
-        cat_dict = uni_cat(elem, elem_de, file_csv, var_weight)
+        cat_dict = uni_cat(
+            elem, elem_de, file_csv, var_weight, weighted, codes, profiles
+        )
 
         statistics.update(cat_dict)
 
@@ -353,66 +360,210 @@ def uni(elem, elem_de, file_csv, var_weight):
 
     elif elem["type"] == "number":
 
-        number_dict = uni_number(elem, file_csv, var_weight)
+        number_dict = uni_number(
+            elem,
+            file_csv,
+            var_weight,
+            density_mode=density_mode,
+            weighted=weighted,
+            profiles=profiles,
+        )
 
         statistics.update(number_dict)
 
     return statistics
 
 
-def bi(base, elem, elem_de, scale, file_csv, file_json, split, weight):
+def split_categories(column, temp):
+    """
+    Categories of a split variable.
+
+    Returns the category keys, their labels and the category code of every row
+    (-1 for rows in no category).
+    """
+    if temp["type"] == "number":
+        keys = list(
+            OrderedDict.fromkeys(
+                int(v) for v in pd.to_numeric(column).dropna().unique()
+            )
+        )
+        labels = keys
+    else:
+        # duplicated values keep their first position and their last label
+        labels_by_key = OrderedDict()
+        for value in temp["values"]:
+            labels_by_key[value["value"]] = value["label"]
+        keys = list(labels_by_key.keys())
+        labels = list(labels_by_key.values())
+    groups = label_codes(column, keys)[0]
+    return keys, labels, groups
+
+
+def group_slices(groups, n_groups):
+    """
+    Row positions of every group, with one stable sort of the group codes.
+    """
+    order = np.argsort(groups, kind="stable")
+    counts = np.bincount(groups[groups >= 0], minlength=n_groups)
+    bounds = np.cumsum(counts) + np.count_nonzero(groups < 0)
+    starts = bounds - counts
+    return [order[start:end] for start, end in zip(starts, bounds)]
+
+
+def bi_cat(
+    elem, elem_de, file_csv, weight, groups, n_groups, codes=None, profiles=None
+):
+    if codes is None:
+        values = [value["value"] for value in elem["values"]]
+        codes = CategoricalCodes(file_csv[elem["name"]], values)
+    frequencies = codes.frequencies(groups=groups, n_groups=n_groups)
+    weighted = [None] * n_groups
+    if weight != "":
+        weights = column_profile(file_csv, weight, profiles).floats
+        weighted = codes.frequencies(weights, groups, n_groups)
+    return [cat_dict(elem, elem_de, f, w) for f, w in zip(frequencies, weighted)]
+
+
+def bi_number(
+    elem,
+    file_csv,
+    weight,
+    groups,
+    n_groups,
+    density_mode="kde",
+    slices=None,
+    profiles=None,
+):
+    # slices: row positions of every category (group_slices, if already known)
+    values = column_profile(file_csv, elem["name"], profiles).floats
+    weights = None
+    if weight != "" and elem["name"] != weight:
+        weights = column_profile(file_csv, weight, profiles).floats
+    if slices is None:
+        slices = group_slices(groups, n_groups)
+    category_stats = []
+    for rows in slices:
+        category_weights = None if weights is None else weights[rows]
+        profile = ColumnProfile(pd.Series(values[rows]))
+        category_stats.append(
+            number_dict(profile, category_weights, density_mode=density_mode)
+        )
+    return category_stats
+
+
+def bi_string(elem, file_csv, groups, n_groups):
+    pairs = pd.DataFrame(
+        dict(group=groups, value=file_csv[elem["name"]].to_numpy())
+    ).drop_duplicates()
+    pairs = pairs[pairs["group"] >= 0]
+    missing = string_missing_mask(pairs["value"].to_numpy())
+    group = pairs["group"].to_numpy()
+    len_missing = np.bincount(group[missing], minlength=n_groups)
+    len_unique = np.bincount(group, minlength=n_groups) - len_missing
+    return [
+        OrderedDict([("frequencies", [int(u)]), ("missings", [int(m)])])
+        for u, m in zip(len_unique, len_missing)
+    ]
+
+
+def bi(
+    base,
+    elem,
+    elem_de,
+    scale,
+    file_csv,
+    file_json,
+    split,
+    weight,
+    density_mode="kde",
+    uni_source=None,
+    codes=None,
+    profiles=None,
+):
     # split: variable for bi-variate analysis
     # base: variable for bi-variate analysis (every variable except split)
-
-    categories = OrderedDict()
+    # uni_source: univariate statistics of base on the whole file (if already known)
+    # codes: CategoricalCodes of base (if already known)
+    # profiles: ColumnProfiles of the variables, the split categories are kept there
 
     for j, temp in enumerate(file_json["resources"][0]["schema"]["fields"]):
         if temp["name"] in split:
             s = temp["name"]
-            bi = OrderedDict()
-            bi[s] = OrderedDict()
-            if temp["type"] == "number":
-                list = map(float, file_csv[temp["name"]].unique())
-            else:
-                list = temp["values"]
-            for index, value in enumerate(list):
-                try:
-                    v = value["value"]
-                except:
-                    v = int(value)
-                temp_csv = file_csv.ix[file_csv[s] == v]
-                categories[v] = uni(elem, elem_de, temp_csv, weight)
-                try:
-                    categories[v]["label"] = temp["values"][index]["label"]
-                except:
-                    categories[v]["label"] = v
-
-                if elem["type"] == "cat":
-                    uni_source = uni(elem, elem_de, temp_csv, weight)
-                    for i in ["values", "missings", "labels"]:
-                        bi[s][i] = uni_source[i]
-                        del categories[v][i]
-
-                elif elem["type"] == "number":
-                    uni_source = uni(elem, elem_de, file_csv, weight)
-                    for i in ["min", "max", "by"]:
-                        bi[s][i] = uni_source[i]
-                        del categories[v][i]
-
-                ###### Marcel Bauernhack ########
-                categories_old = categories
-                categories = OrderedDict()
-                for key, value in categories_old.items():
-                    categories[str(key)] = value
-                ##############
-
-                ordered_categories = OrderedDict(sorted(categories.items()))
-
-            bi[s].update(
-                OrderedDict(
-                    [("label", temp["label"]), ("categories", ordered_categories)]
+
+            # factorize the split variable once, statistics for all categories
+            split_profile = column_profile(file_csv, s, profiles)
+            if split_profile.categories is None:
+                split_profile.categories = split_categories(file_csv[s], temp)
+            keys, labels, groups = split_profile.categories
+            if elem["type"] == "cat":
+                category_stats = bi_cat(
+                    elem,
+                    elem_de,
+                    file_csv,
+                    weight,
+                    groups,
+                    len(keys),
+                    codes,
+                    profiles,
                 )
-            )
+            elif elem["type"] == "string":
+                category_stats = bi_string(elem, file_csv, groups, len(keys))
+            elif elem["type"] == "number":
+                if split_profile.slices is None:
+                    split_profile.slices = group_slices(groups, len(keys))
+                category_stats = bi_number(
+                    elem,
+                    file_csv,
+                    weight,
+                    groups,
+                    len(keys),
+                    density_mode,
+                    split_profile.slices,
+                    profiles,
+                )
+                if uni_source is None:
+                    uni_source = uni(
+                        elem,
+                        elem_de,
+                        file_csv,
+                        weight,
+                        density_mode,
+                        profiles=profiles,
+                    )
+
+            bi = bi_dict(elem, temp, keys, labels, category_stats, uni_source)
+
+    return bi
+
+
+def bi_dict(elem, temp, keys, labels, category_stats, uni_source=None):
+    # temp: metadata of the split variable
+    # category_stats: statistics of base for every category of the split variable
+    s = temp["name"]
+    bi = OrderedDict()
+    bi[s] = OrderedDict()
+
+    categories = OrderedDict()
+    for key, label, statistics in zip(keys, labels, category_stats):
+        statistics["label"] = label
+
+        if elem["type"] == "cat":
+            for i in ["values", "missings", "labels"]:
+                bi[s][i] = statistics[i]
+                del statistics[i]
+
+        elif elem["type"] == "number":
+            for i in ["min", "max", "by"]:
+                bi[s][i] = uni_source[i]
+                del statistics[i]
+
+        categories[str(key)] = statistics
+
+    ordered_categories = OrderedDict(sorted(categories.items()))
+
+    bi[s].update(
+        OrderedDict([("label", temp["label"]), ("categories", ordered_categories)])
+    )
 
     return bi
 
@@ -431,7 +582,95 @@ def stat_dict(
     sub_type,
     study,
     log,
+    density_mode="kde",
+    weighted=None,
+    codes=None,
+    profiles=None,
+    extended_missings=None,
 ):
+    # extended_missings: int8 codes of the extended missing values (ddi.missings)
+    scale = elem["type"][0:3]
+
+    # one profile per column for all statistics of the variable
+    if profiles is None:
+        profiles = dict()
+
+    stat_dict = stat_header(elem, file_json, analysis_unit, period, sub_type, study)
+    stat_dict["uni"] = uni(
+        elem, elem_de, file_csv, weight, density_mode, weighted, codes, profiles
+    )
+    if extended_missings is not None:
+        stat_dict["uni"]["extended_missings"] = extended_missings_dict(
+            extended_missings
+        )
+    stat_dict["error"] = stat_error(file_json, log)
+
+    if elem["type"] == "number" or elem["type"] == "cat":
+        if column_profile(file_csv, elem["name"], profiles).n_valid > 10:
+            stat_dict["statistics"] = uni_statistics(elem, file_csv, codes, profiles)
+    else:
+        stat_dict["statistics"] = uni_statistics(elem, file_csv)
+
+    if elem_de != "":
+        stat_dict["label_de"] = elem_de["label"]
+    try:
+        if use_split(elem, split):
+            stat_dict["bi"] = bi(
+                elem["name"],
+                elem,
+                elem_de,
+                scale,
+                file_csv,
+                file_json,
+                split,
+                weight,
+                density_mode,
+                stat_dict["uni"],
+                codes,
+                profiles,
+            )
+    except:
+        pass
+
+    return stat_dict
+
+
+def extended_missings_dict(codes):
+    """
+    Frequencies of the extended missing values (., .a to .z) with their labels.
+    """
+    counts = count_missings(codes)
+    return OrderedDict(
+        [("labels", list(counts.keys())), ("frequencies", list(counts.values()))]
+    )
+
+
+def use_split(elem, split):
+    """
+    True if there are bivariate statistics of elem for split.
+    """
+    try:
+        return (
+            elem["name"] not in split
+            and split != [np.nan]
+            and split != [""]
+            and str(split) != "nan"
+        )
+    except TypeError:
+        return False
+
+
+def stat_error(file_json, log):
+    try:
+        return log[file_json["name"]]
+    except:
+        return "No Errors"
+
+
+def stat_header(elem, file_json, analysis_unit, period, sub_type, study):
+    """
+    Study, dataset and variable information of the statistics of elem.
+    """
     scale = elem["type"][0:3]
 
     if type(sub_type) == np.float64 and math.isnan(sub_type) == True:
@@ -470,40 +709,144 @@ def stat_dict(
     stat_dict["name_cs"] = elem["name"]
     stat_dict["label"] = elem["label"]
     stat_dict["scale"] = scale
-    stat_dict["uni"] = uni(elem, elem_de, file_csv, weight)
-    stat_dict["error"] = "No Errors"
 
-    try:
-        stat_dict["error"] = log[file_json["name"]]
-    except:
-        pass
+    return stat_dict
 
-    if elem["type"] == "number" or elem["type"] == "cat":
-        data_wm = file_csv[file_csv[elem["name"]] >= 0][elem["name"]]
-        if sum(Counter(data_wm.values).values()) > 10:
-            stat_dict["statistics"] = uni_statistics(elem, file_csv)
-    else:
-        stat_dict["statistics"] = uni_statistics(elem, file_csv)
 
-    if elem_de != "":
-        stat_dict["label_de"] = elem_de["label"]
+def element_stat(element, data, context):
+    elem, elem_de = element
     try:
-        if (
-            elem["name"] not in split
-            and split != [np.nan]
-            and split != [""]
-            and str(split) != "nan"
-        ):
-            stat_dict["bi"] = bi(
-                elem["name"], elem, elem_de, scale, file_csv, file_json, split, weight
+        # categorical codes are built once per variable for all consumers
+        codes = context["codes"].get(elem["name"])
+        if codes is None and elem["type"] == "cat":
+            values = [value["value"] for value in elem["values"]]
+            codes = CategoricalCodes(data[elem["name"]], values)
+        # profiles of the split and weight variables are kept for the run,
+        # the profile of the variable only for its own statistics
+        for name in context["shared"]:
+            column_profile(data, name, context["profiles"])
+        stat = stat_dict(
+            context["dataset_name"],
+            elem,
+            elem_de,
+            data,
+            context["metadata"],
+            context["metadata_de"],
+            context["split"],
+            context["weight"],
+            context["analysis_unit"],
+            context["period"],
+            context["sub_type"],
+            context["study"],
+            context["log"],
+            context["density_mode"],
+            context["weighted"],
+            codes,
+            dict(context["profiles"]),
+            context["missings"].get(elem["name"]),
+        )
+        if context["vistest"] != "":
+            write_vistest(
+                stat, context["dataset_name"], elem["name"], context["vistest"]
             )
+        return stat
     except:
-        pass
+        logger.error("[ERROR] in parsing %s" % elem)
 
-    return stat_dict
 
+def shared_columns(data, metadata, split, weight):
+    """
+    Names of the split and weight variables, which are used by every variable.
+    """
+    names = []
+    for temp in metadata["resources"][0]["schema"]["fields"]:
+        try:
+            if temp["name"] in split and temp["name"] in data:
+                names.append(temp["name"])
+        except TypeError:
+            pass
+    if weight != "" and weight in data:
+        names.append(weight)
+    return names
 
-def generate_stat(
+
+def cache_key(element, data, context, cache, fingerprints):
+    """
+    Cache key of the statistics of a variable.
+
+    The key covers the data of the variable, the split and the weight variables,
+    the metadata and all parameters of stat_dict. fingerprints keeps the hashes
+    of the split and weight variables for the run.
+    """
+    elem, elem_de = element
+    metadata = context["metadata"]
+    try:
+        error = context["log"][metadata["name"]]
+    except (KeyError, TypeError):
+        error = None
+    description = dict(
+        elem=elem,
+        elem_de=elem_de,
+        shared=[
+            temp
+            for temp in metadata["resources"][0]["schema"]["fields"]
+            if temp["name"] in context["shared"]
+        ],
+        dataset={key: metadata[key] for key in metadata if key != "resources"},
+        parameters=[
+            context[name]
+            for name in [
+                "dataset_name",
+                "split",
+                "weight",
+                "analysis_unit",
+                "period",
+                "sub_type",
+                "study",
+                "density_mode",
+            ]
+        ],
+        error=error,
+    )
+    columns = []
+    for name in [elem["name"]] + context["shared"]:
+        if name not in data:
+            columns.append("")
+        elif name in fingerprints:
+            columns.append(fingerprints[name])
+        else:
+            columns.append(fingerprint(data[name]))
+            if name in context["shared"]:
+                fingerprints[name] = columns[-1]
+    if elem["name"] in context["missings"]:
+        columns.append(fingerprint(pd.Series(context["missings"][elem["name"]])))
+    return cache.key(description, columns)
+
+
+def stat_elements(metadata, metadata_de, columns=None):
+    """
+    Metadata of every variable with its german metadata ("" without metadata_de).
+
+    With columns, only the variables in columns (the split and weight variables
+    stay in the metadata for the bivariate and weighted statistics).
+    """
+    if metadata_de != "":
+        elements = list(
+            zip(
+                metadata["resources"][0]["schema"]["fields"],
+                metadata_de["resources"][0]["schema"]["fields"],
+            )
+        )
+    else:
+        elements = list()
+        for elem in metadata["resources"][0]["schema"]["fields"]:
+            elements.append((elem, ""))
+    if columns is not None:
+        elements = [element for element in elements if element[0]["name"] in columns]
+    return elements
+
+
+def iter_stat(
     dataset_name,
     data,
     metadata,
@@ -516,41 +859,343 @@ def generate_stat(
     sub_type,
     study,
     log,
+    density_mode="kde",
+    jobs=1,
+    codes=None,
+    cache=None,
+    columns=None,
+    missings=None,
 ):
-    stat = []
-    if metadata_de != "":
-        elements = zip(
-            metadata["resources"][0]["schema"]["fields"],
-            metadata_de["resources"][0]["schema"]["fields"],
+    # codes: CategoricalCodes of the categorical variables (encode_categoricals)
+    # cache: StatsCache, only variables which are not in the cache are computed
+    # columns: names of the variables with statistics (all if None)
+    # missings: extended missing values per variable (read_stata_missings)
+    # codes which do not fit the data or the labels (i.e. edited after reading)
+    # are rebuilt
+    elements = stat_elements(metadata, metadata_de, columns)
+    labels = {
+        elem["name"]: [value["value"] for value in elem["values"]]
+        for elem, _ in elements
+        if elem["type"] == "cat" and elem["name"] in data
+    }
+    codes = {
+        name: code
+        for name, code in (codes or dict()).items()
+        if name in labels and code.matches(data[name], labels[name])
+    }
+    # only the int8 codes of the extended missings are used
+    missings = {
+        name: missing[0]
+        for name, missing in (missings or dict()).items()
+        if len(missing[0]) == len(data)
+    }
+    context = dict(
+        dataset_name=dataset_name,
+        metadata=metadata,
+        metadata_de=metadata_de,
+        vistest=vistest,
+        split=split,
+        weight=weight,
+        analysis_unit=analysis_unit,
+        period=period,
+        sub_type=sub_type,
+        study=study,
+        log=log,
+        density_mode=density_mode,
+        weighted=None,
+        # the workers of a process pool build the codes of their variables
+        codes=codes if jobs <= 1 else dict(),
+        profiles=dict(),
+        shared=shared_columns(data, metadata, split, weight),
+        missings=missings,
+    )
+    keys = [None] * len(elements)
+    cached = [False] * len(elements)
+    if cache is not None:
+        fingerprints = dict()
+        for i, element in enumerate(elements):
+            keys[i] = cache_key(element, data, context, cache, fingerprints)
+            cached[i] = cache.has(keys[i])
+    missing = [element for element, hit in zip(elements, cached) if not hit]
+    # weighted frequencies of all variables in one sweep
+    if weight != "" and weight in data and missing:
+        context["weighted"] = weighted_frequencies(
+            data, [elem for elem, _ in missing], weight, codes
         )
+    # variables are independent: with jobs > 1 they are spread over a process pool,
+    # the results keep the order of the metadata
+    if jobs > 1 and missing:
+        results = parallel_map(element_stat, missing, data, context, jobs)
     else:
-        elements = list()
-        for elem in metadata["resources"][0]["schema"]["fields"]:
-            elements.append((elem, ""))
-    for elem, elem_de in elements:
+        results = (element_stat(element, data, context) for element in missing)
+    # cached statistics are loaded one at a time (stream keeps one variable in memory)
+    for element, key, hit in zip(elements, keys, cached):
+        stat = cache.get(key) if hit else None
+        if stat is None:
+            if hit:
+                # removed from the cache since the lookup (i.e. by another process)
+                stat = element_stat(element, data, context)
+            else:
+                stat = next(results)
+            if cache is not None and stat is not None:
+                cache.put(key, stat)
+        elif vistest != "":
+            write_vistest(stat, dataset_name, element[0]["name"], vistest)
+        if stat is not None:
+            yield stat
+    if cache is not None:
+        cache.log()
+
+
+def split_field(metadata, split):
+    """
+    Metadata of the split variable; bi keeps the last variable in split.
+    """
+    temp_split = None
+    for temp in metadata["resources"][0]["schema"]["fields"]:
         try:
-            stat.append(
-                stat_dict(
-                    dataset_name,
-                    elem,
-                    elem_de,
-                    data,
-                    metadata,
-                    metadata_de,
-                    split,
-                    weight,
-                    analysis_unit,
-                    period,
-                    sub_type,
-                    study,
-                    log,
+            if temp["name"] in split:
+                temp_split = temp
+        except TypeError:
+            pass
+    return temp_split
+
+
+def new_accumulator(elem):
+    if elem["type"] == "cat":
+        return CategoricalAccumulator([value["value"] for value in elem["values"]])
+    if elem["type"] == "number":
+        return NumberAccumulator()
+    return StringAccumulator(string_missing_mask)
+
+
+def group_accumulators(elem, accumulators, keys, labels):
+    # accumulators: OrderedDict with the label and the accumulator of every category
+    result = []
+    for key, label in zip(keys, labels):
+        if key not in accumulators:
+            accumulators[key] = (label, new_accumulator(elem))
+        result.append(accumulators[key][1])
+    return result
+
+
+def accumulate_chunk(chunk, fields, uni_acc, bi_acc, temp, split, weight):
+    """
+    First pass: add the rows of a chunk to the accumulators of every variable.
+    """
+    weights = None
+    if weight != "" and weight in chunk:
+        weights = np.nan_to_num(chunk[weight].to_numpy(dtype=np.float64))
+    groups = None
+    if temp is not None and temp["name"] in chunk:
+        keys, labels, groups = split_categories(chunk[temp["name"]], temp)
+        slices = group_slices(groups, len(keys))
+    for elem in fields:
+        name = elem["name"]
+        if name not in chunk:
+            continue
+        profile = ColumnProfile(chunk[name])
+        use_weights = weight != "" and (elem["type"] == "cat" or name != weight)
+        if elem["type"] == "string":
+            uni_acc[name].add(chunk[name])
+        else:
+            uni_acc[name].add(profile, weights if use_weights else None)
+        if groups is None or not use_split(elem, split):
+            continue
+        accumulators = group_accumulators(elem, bi_acc[name], keys, labels)
+        if elem["type"] == "cat":
+            codes = CategoricalCodes(chunk[name], uni_acc[name].values)
+            frequencies = codes.frequencies(groups=groups, n_groups=len(keys))
+            weighted = [None] * len(keys)
+            if use_weights:
+                weighted = codes.frequencies(weights, groups, len(keys))
+            for accumulator, f, w in zip(accumulators, frequencies, weighted):
+                accumulator.add_frequencies(f, w)
+        elif elem["type"] == "number":
+            for accumulator, rows in zip(accumulators, slices):
+                accumulator.add(
+                    ColumnProfile(pd.Series(profile.floats[rows])),
+                    weights[rows] if use_weights else None,
                 )
-            )
-            if vistest != "":
-                write_vistest(stat[-1], dataset_name, elem["name"], vistest)
-        except:
+        else:
+            values = chunk[name].to_numpy()
+            for accumulator, rows in zip(accumulators, slices):
+                accumulator.add_unique(pd.unique(values[rows]))
+
+
+def accumulate_bins(chunk, fields, uni_acc, bi_acc, temp):
+    """
+    Second pass: bin the values of numeric variables with too many distinct values.
+    """
+    groups = None
+    if temp is not None and temp["name"] in chunk:
+        keys, labels, groups = split_categories(chunk[temp["name"]], temp)
+        slices = group_slices(groups, len(keys))
+    for elem in fields:
+        name = elem["name"]
+        if elem["type"] != "number" or name not in chunk:
+            continue
+        profile = ColumnProfile(chunk[name])
+        if uni_acc[name].grid is not None:
+            uni_acc[name].add_bins(profile)
+        if groups is None or not bi_acc[name]:
+            continue
+        for key, rows in zip(keys, slices):
+            accumulator = bi_acc[name][key][1]
+            if accumulator.grid is not None:
+                accumulator.add_bins(ColumnProfile(pd.Series(profile.floats[rows])))
+
+
+def accumulated_uni(elem, elem_de, accumulator, weight, density_mode="kde"):
+    if elem["type"] == "cat":
+        weighted = accumulator.weighted if weight != "" else None
+        return cat_dict(elem, elem_de, accumulator.frequencies, weighted)
+    if elem["type"] == "number":
+        return format_number_dict(
+            accumulator.density(mode=density_mode),
+            accumulator.size,
+            accumulator.size - accumulator.n_nan,
+            *accumulator.missing_frequencies(),
+            accumulator.weighted_missing_frequencies()
+        )
+    len_unique, len_missing = accumulator.distinct_counts()
+    return OrderedDict([("frequencies", [len_unique]), ("missings", [len_missing])])
+
+
+def accumulated_statistics(elem, accumulator):
+    if elem["type"] == "cat":
+        if accumulator.n_valid <= 10:
+            return None
+        names = ["Median", "Valid", "Invalid"]
+        invalid = accumulator.null_count
+        values = [accumulator.median(), accumulator.size - invalid, invalid]
+    elif elem["type"] == "number":
+        if accumulator.n <= 10:
+            return None
+        number_summary = accumulator.summary()
+        names = list(number_summary.keys())
+        values = list(number_summary.values())
+    else:
+        names = ["Valid", "Invalid"]
+        invalid = accumulator.null_count + accumulator.empty
+        values = [accumulator.size - invalid, invalid]
+    return OrderedDict([("names", names), ("values", [str(v) for v in values])])
+
+
+def iter_chunked_stat(
+    dataset_name,
+    chunks,
+    metadata,
+    metadata_de,
+    vistest,
+    split,
+    weight,
+    analysis_unit,
+    period,
+    sub_type,
+    study,
+    log,
+    density_mode="kde",
+    columns=None,
+):
+    """
+    Statistics of data in row chunks (i.e. StataChunks), which is never loaded at once.
+
+    The chunks feed the accumulators (accumulators.py); a second pass is
+    only needed for numeric variables with more than MAX_DISTINCT values.
+    The output has the same schema as iter_stat.
+    """
+    elements = stat_elements(metadata, metadata_de, columns)
+    fields = [elem for elem, _ in elements]
+    temp = split_field(metadata, split)
+    uni_acc = {elem["name"]: new_accumulator(elem) for elem in fields}
+    bi_acc = {elem["name"]: OrderedDict() for elem in fields}
+    read_columns = set()
+    for chunk in chunks:
+        read_columns.update(chunk.columns)
+        accumulate_chunk(chunk, fields, uni_acc, bi_acc, temp, split, weight)
+    binned = [
+        accumulator
+        for accumulators in [list(uni_acc.values())]
+        + [[a for _, a in categories.values()] for categories in bi_acc.values()]
+        for accumulator in accumulators
+        if isinstance(accumulator, NumberAccumulator) and accumulator.needs_bins
+    ]
+    if binned:
+        for accumulator in binned:
+            accumulator.start_bins()
+        for chunk in chunks:
+            accumulate_bins(chunk, fields, uni_acc, bi_acc, temp)
+    for elem, elem_de in elements:
+        if elem["name"] not in read_columns:
             logger.error("[ERROR] in parsing %s" % elem)
-    return stat
+            continue
+        accumulator = uni_acc[elem["name"]]
+        stat = stat_header(elem, metadata, analysis_unit, period, sub_type, study)
+        stat["uni"] = accumulated_uni(elem, elem_de, accumulator, weight, density_mode)
+        stat["error"] = stat_error(metadata, log)
+        statistics = accumulated_statistics(elem, accumulator)
+        if statistics is not None:
+            stat["statistics"] = statistics
+        if elem_de != "":
+            stat["label_de"] = elem_de["label"]
+        if bi_acc[elem["name"]]:
+            keys = sorted(bi_acc[elem["name"]].keys(), key=str)
+            labels = [bi_acc[elem["name"]][key][0] for key in keys]
+            category_stats = [
+                accumulated_uni(
+                    elem, elem_de, bi_acc[elem["name"]][key][1], weight, density_mode
+                )
+                for key in keys
+            ]
+            stat["bi"] = bi_dict(elem, temp, keys, labels, category_stats, stat["uni"])
+        if vistest != "":
+            write_vistest(stat, dataset_name, elem["name"], vistest)
+        yield stat
+
+
+def generate_stat(
+    dataset_name,
+    data,
+    metadata,
+    metadata_de,
+    vistest,
+    split,
+    weight,
+    analysis_unit,
+    period,
+    sub_type,
+    study,
+    log,
+    density_mode="kde",
+    jobs=1,
+    codes=None,
+    cache=None,
+    columns=None,
+    missings=None,
+):
+    return list(
+        iter_stat(
+            dataset_name,
+            data,
+            metadata,
+            metadata_de,
+            vistest,
+            split,
+            weight,
+            analysis_unit,
+            period,
+            sub_type,
+            study,
+            log,
+            density_mode,
+            jobs,
+            codes,
+            cache,
+            columns,
+            missings,
+        )
+    )
 
 
 def write_vistest(stat, dataset_name, var_name, vistest):
@@ -562,6 +1207,69 @@ def write_vistest(stat, dataset_name, var_name, vistest):
         json.dump(stat, json_file, indent=2)
 
 
+class StatStream:
+    """
+    Statistics for the templates, computed while the template is rendered.
+
+    The templates may look at the first variable (stat[0]) before iterating.
+    """
+
+    def __init__(self, stat):
+        self.stat = iter(stat)
+        self.first = []
+
+    def __getitem__(self, index):
+        if index != 0:
+            raise IndexError("Only the first variable is available.")
+        if not self.first:
+            self.first.append(next(self.stat))
+        return self.first[0]
+
+    def __iter__(self):
+        while self.first:
+            yield self.first.pop()
+        for x in self.stat:
+            yield x
+
+
+def dump_json(stat, json_file, compact=False):
+    """
+    Write the statistics as json array, one variable after the other.
+
+    Without compact the output is the same as json.dump(stat, json_file, indent=2).
+    """
+    json_file.write("[")
+    separator = ""
+    for x in stat:
+        if compact:
+            json_file.write(separator + json.dumps(x, separators=(",", ":")))
+        else:
+            json_file.write(
+                separator + "\n" + textwrap.indent(json.dumps(x, indent=2), "  ")
+            )
+        separator = ","
+    if separator and not compact:
+        json_file.write("\n")
+    json_file.write("]")
+
+
+def dump_jsonl(stat, json_file, compact=False):
+    """
+    Write the statistics as json lines, one variable per line.
+    """
+    separators = (",", ":") if compact else None
+    for x in stat:
+        json_file.write(json.dumps(x, separators=separators) + "\n")
+
+
+def dump_yaml(stat, yaml_file):
+    """
+    Write the statistics as yaml documents, one variable per document.
+    """
+    for x in stat:
+        yaml_file.write(yaml.dump(x, default_flow_style=False, explicit_start=True))
+
+
 def write_stats(
     data,
     metadata,
@@ -576,43 +1284,109 @@ def write_stats(
     metadata_de="",
     vistest="",
     log="",
+    density_mode="kde",
+    jobs=1,
+    stream=False,
+    compact=False,
+    codes=None,
+    cache=None,
+    columns=None,
+    missings=None,
 ):
+    # missings: extended missing values per variable (read_stata_missings),
+    #           not used with data in chunks
     dataset_name = re.search("^.*\/([^-]*)\..*$", filename).group(1)
-    stat = generate_stat(
-        dataset_name,
-        data,
-        metadata,
-        metadata_de,
-        vistest,
-        split,
-        weight,
-        analysis_unit,
-        period,
-        sub_type,
-        study,
-        log,
-    )
+    if isinstance(data, StataChunks):
+        ignored = [
+            name
+            for name, used in [
+                ("jobs", jobs > 1),
+                ("codes", codes is not None),
+                ("cache", cache is not None),
+                ("missings", missings is not None),
+            ]
+            if used
+        ]
+        if ignored:
+            logger.warning(
+                "%s not used with data in chunks: %s"
+                % (", ".join(ignored), dataset_name)
+            )
+        # data in row chunks: accumulate the statistics chunk by chunk
+        stat = iter_chunked_stat(
+            dataset_name,
+            data,
+            metadata,
+            metadata_de,
+            vistest,
+            split,
+            weight,
+            analysis_unit,
+            period,
+            sub_type,
+            study,
+            log,
+            density_mode,
+            columns,
+        )
+    else:
+        stat = iter_stat(
+            dataset_name,
+            data,
+            metadata,
+            metadata_de,
+            vistest,
+            split,
+            weight,
+            analysis_unit,
+            period,
+            sub_type,
+            study,
+            log,
+            density_mode,
+            jobs,
+            codes,
+            cache,
+            columns,
+            missings,
+        )
+    # stream: write every variable as soon as it is computed
+    if not stream:
+        stat = list(stat)
     if file_type == "json":
         logger.info('write "' + filename + '"')
         with open(filename, "w") as json_file:
-            json.dump(stat, json_file, indent=2)
+            dump_json(stat, json_file, compact)
+    elif file_type == "jsonl":
+        logger.info('write "' + filename + '"')
+        with open(filename, "w") as json_file:
+            dump_jsonl(stat, json_file, compact)
     elif file_type == "yaml":
         logger.info('write "' + filename + '"')
         with open(filename, "w") as yaml_file:
-            yaml_file.write(yaml.dump(stat, default_flow_style=False))
+            if stream:
+                dump_yaml(stat, yaml_file)
+            else:
+                yaml_file.write(yaml.dump(stat, default_flow_style=False))
     elif file_type == "html":
         template = Template(template_stats_html)
-        stats_html = template.render(stat=stat)
         logger.info('write "' + filename + '"')
-        Html_file = open(filename, "w")
-        Html_file.write(stats_html)
-        Html_file.close()
+        if stream:
+            template.stream(stat=StatStream(stat)).dump(filename)
+        else:
+            stats_html = template.render(stat=stat)
+            Html_file = open(filename, "w")
+            Html_file.write(stats_html)
+            Html_file.close()
     elif file_type == "md":
         template = Template(template_stats_md)
-        stats_md = template.render(stat=[(x, json.dumps(x)) for x in stat])
         logger.info('write "' + filename + '"')
-        Md_file = open(filename, "w")
-        Md_file.write(stats_md)
-        Md_file.close()
+        if stream:
+            template.stream(stat=((x, json.dumps(x)) for x in stat)).dump(filename)
+        else:
+            stats_md = template.render(stat=[(x, json.dumps(x)) for x in stat])
+            Md_file = open(filename, "w")
+            Md_file.write(stats_md)
+            Md_file.close()
     else:
         logger.error("[ERROR] Unknown file type.")
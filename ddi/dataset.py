@@ -1,12 +1,22 @@
+import logging
 import re
 
 import ddi.tests.test_values as test_values
-from ddi.convert.read_stata import read_stata
+from ddi.convert.columnar import read_columnar, write_columnar
+from ddi.convert.dtypes import compact_dtypes
+from ddi.convert.frequencies import encode_categoricals
+from ddi.convert.read_stata import (
+    read_stata,
+    read_stata_metadata,
+    read_stata_missings,
+)
 from ddi.convert.read_tdp import read_tdp
 from ddi.convert.write_stata import write_stata
 from ddi.convert.write_stats import write_stats
 from ddi.convert.write_tdp import write_tdp
 
+logger = logging.getLogger(__name__)
+
 
 class Dataset:
     """
@@ -24,8 +34,35 @@ class Dataset:
     def __init__(self):
         self.dataset = None
         self.metadata = None
+        self.codes = None
+        self.columns = None
+        # memory of the data in bytes before and after compact dtypes
+        self.memory = None
+        # int8 codes of Stata's extended missing values (., .a to .z) per variable
+        self.missings = None
+
+    def _encode_categoricals(self):
+        # integer codes of the categorical variables, built once at load time
+        self.codes = encode_categoricals(
+            self.dataset, self.metadata["resources"][0]["schema"]["fields"]
+        )
+
+    def _compact_dtypes(self):
+        # smaller dtypes with the same statistics, memory is logged and kept
+        self.dataset, self.memory = compact_dtypes(
+            self.dataset, self.metadata["resources"][0]["schema"]["fields"]
+        )
 
-    def read_tdp(self, csv_name, json_name):
+    def read_tdp(
+        self,
+        csv_name,
+        json_name,
+        columns=None,
+        split="",
+        weight="",
+        engine="c",
+        compact_dtypes=False,
+    ):
         """
         Function to read data in tabular data package format.
         
@@ -33,26 +70,145 @@ class Dataset:
         
         csv_name: Name of the row data in tabular format
         json_name: Name of the metadata in json format
+        columns: Names of the variables to read; Standard is None (all variables)
+        split: Name of the split variable(s), read with columns; Standard is ""
+        weight: Name of the weight variable, read with columns; Standard is ""
+        engine: CSV parser, "c" or "pyarrow" (multithreaded, needs pyarrow); Standard is "c"
+        compact_dtypes: Store integers in the smallest type and repeated strings as
+                        categories, the memory before and after is kept in self.memory
+                        (not with chunksize); Standard is False
+        
+        The integer codes of the categorical variables are built once (self.codes).
+        With columns, write_stats computes the statistics of these variables only.
         
         Example:
         
         dataset.read_tdp("../input/dataset.csv", "../input/dataset.json")
+        dataset.read_tdp("../input/dataset.csv", "../input/dataset.json", columns=["inc"], split="wave")
+        dataset.read_tdp("../input/dataset.csv", "../input/dataset.json", engine="pyarrow")
         """
-        self.dataset, self.metadata = read_tdp(csv_name, json_name)
+        self.dataset, self.metadata = read_tdp(
+            csv_name,
+            json_name,
+            columns=columns,
+            split=split,
+            weight=weight,
+            engine=engine,
+        )
+        self.columns = columns
+        self.missings = None
+        if compact_dtypes:
+            self._compact_dtypes()
+        self._encode_categoricals()
 
-    def read_stata(self, dta_name):
+    def read_stata(
+        self,
+        dta_name,
+        chunksize=None,
+        columns=None,
+        split="",
+        weight="",
+        metadata_only=False,
+        compact_dtypes=False,
+        extended_missings=False,
+    ):
         """
         Function to read data in stata format.
         
         Parameter:
         
         dta_name: Name of the data in stata format
+        chunksize: Read the data in chunks of rows while writing the statistics
+                   (for data larger than the memory); Standard is None
+        columns: Names of the variables to read; Standard is None (all variables)
+        split: Name of the split variable(s), read with columns; Standard is ""
+        weight: Name of the weight variable, read with columns; Standard is ""
+        metadata_only: Read only the metadata (i.e. for write_stata), the data is None;
+                       Standard is False
+        compact_dtypes: Store integers in the smallest type and repeated strings as
+                        categories, the memory before and after is kept in self.memory
+                        (not with chunksize); Standard is False
+        extended_missings: Keep the extended missing values (., .a to .z) as int8 codes
+                           in self.missings, write_stats reports their frequencies
+                           (not with chunksize); Standard is False
+        
+        The integer codes of the categorical variables are built once (self.codes).
+        With columns, write_stats computes the statistics of these variables only.
         
         Example:
         
         dataset.read_stata("../input/dataset.dta")        
+        dataset.read_stata("../input/dataset.dta", chunksize=100000)
+        dataset.read_stata("../input/dataset.dta", columns=["inc"], split="wave", weight="weight")
+        dataset.read_stata("../input/dataset.dta", metadata_only=True)
+        dataset.read_stata("../input/dataset.dta", extended_missings=True)
+        """
+        self.missings = None
+        if chunksize is not None and not metadata_only:
+            ignored = [
+                name
+                for name, used in [
+                    ("compact_dtypes", compact_dtypes),
+                    ("extended_missings", extended_missings),
+                ]
+                if used
+            ]
+            if ignored:
+                logger.warning(
+                    "%s not used with chunksize: %s" % (", ".join(ignored), dta_name)
+                )
+        if metadata_only:
+            self.dataset = None
+            self.metadata = read_stata_metadata(
+                dta_name, columns=columns, split=split, weight=weight
+            )
+            self.columns = columns
+            self.codes = None
+            return
+        if extended_missings and chunksize is None:
+            self.dataset, self.metadata, self.missings = read_stata_missings(
+                dta_name, columns=columns, split=split, weight=weight
+            )
+        else:
+            self.dataset, self.metadata = read_stata(
+                dta_name,
+                chunksize=chunksize,
+                columns=columns,
+                split=split,
+                weight=weight,
+            )
+        self.columns = columns
+        if chunksize is None:
+            if compact_dtypes:
+                self._compact_dtypes()
+            self._encode_categoricals()
+        else:
+            self.codes = None
+
+    def read_columnar(self, input_path, columns=None, split="", weight=""):
+        """
+        Function to read data in columnar format (see write_columnar).
+        
+        Parameter:
+        
+        input_path: Name of the directory with the columns and the metadata
+        columns: Names of the variables to read; Standard is None (all variables)
+        split: Name of the split variable(s), read with columns; Standard is ""
+        weight: Name of the weight variable, read with columns; Standard is ""
+        
+        Numeric columns are memory-mapped: only the parts of the files which are used
+        are read from disk.
+        
+        Example:
+        
+        dataset.read_columnar("../input/dataset")
         """
-        self.dataset, self.metadata = read_stata(dta_name)
+        self.dataset, self.metadata = read_columnar(
+            input_path, columns=columns, split=split, weight=weight
+        )
+        self.columns = columns
+        self.missings = None
+        self._encode_categoricals()
 
     def write_stats(
         self,
@@ -66,6 +222,12 @@ class Dataset:
         study="",
         metadata_de="",
         log="",
+        density_mode="kde",
+        jobs=1,
+        stream=False,
+        compact=False,
+        cache=None,
+        columns=None,
     ):
         """
         Function to write statistics from data in json/html format.
@@ -73,9 +235,17 @@ class Dataset:
         Parameter:
         
         output_name: Name of the output file
-        file_type: Statistics are read out in json or html; Standard is "json"
+        file_type: Statistics are read out in json, jsonl, yaml, html or md; Standard is "json"
         split: Name of the variable(s) for bivariate statistics; Standard is ""
         weight: Name of the weight variable; Standard is ""
+        density_mode: Density of numeric variables as binned "kde", "histogram" or
+                      "exact" (scipy) kde; Standard is "kde"
+        jobs: Number of processes for the statistics of the variables; Standard is 1
+        stream: Write every variable as soon as it is computed; Standard is False
+        compact: Write json without indentation; Standard is False
+        cache: StatsCache, statistics of unchanged variables are read from it; Standard is None
+        columns: Names of the variables with statistics; Standard is None
+                 (the columns of read_stata/read_tdp or all variables)
         
         Example:
         
@@ -94,6 +264,14 @@ class Dataset:
             study=study,
             metadata_de=metadata_de,
             log=log,
+            density_mode=density_mode,
+            jobs=jobs,
+            stream=stream,
+            compact=compact,
+            codes=self.codes,
+            cache=cache,
+            columns=columns if columns is not None else self.columns,
+            missings=self.missings,
         )
 
     def write_tdp(self, output_csv, output_json):
@@ -111,6 +289,20 @@ class Dataset:
         """
         write_tdp(self.dataset, self.metadata, output_csv, output_json)
 
+    def write_columnar(self, output_path):
+        """
+        Function to write data in columnar format, one binary file per column.
+        
+        Parameter:
+        
+        output_path: Name of the directory for the columns and the metadata
+        
+        Example:
+        
+        dataset.write_columnar("../output/dataset") 
+        """
+        write_columnar(self.dataset, self.metadata, output_path)
+
     def write_stata(self, output_name):
         """
         Function to write data in stata format.
@@ -1,7 +1,10 @@
 from lxml.builder import ET
 
+import numpy as np
 import pandas as pd
 
+from .missings import count_missings, restore_missings
+
 
 class DDI:
     """
@@ -11,6 +14,24 @@ class DDI:
     def __init__(self):
         self.meta = {}
         self.data = None
+        # CategoricalCodes of the labelled variables
+        self.codes = {}
+        # extended missing values of Stata (split_missings)
+        self.missings = {}
+        self._stata = None
+
+    @property
+    def stata(self):
+        """
+        Data with Stata's extended missing values, built from data on first use.
+        """
+        if self._stata is None and self.data is not None:
+            self._stata = restore_missings(self.data, self.missings)
+        return self._stata
+
+    @stata.setter
+    def stata(self, stata):
+        self._stata = stata
 
     def add_statistics(self):
         for varname, meta in self.meta.items():
@@ -28,10 +49,14 @@ class DDI:
         return doc
 
     def _add_frequencies(self, var, varname, meta):
+        codes = self.codes.get(varname)
+        values = list((meta.get("value_labels") or dict()).keys())
+        if codes is not None and not codes.unlabelled and codes.matches(var, values):
+            self._add_code_frequencies(var, codes, meta)
+            return
         if len(var.unique()) < 30:
-            counts = dict(var.value_counts(dropna=False, sort=False))
-            for x in counts.keys():
-                e = counts.pop(x)
+            counts = {}
+            for x, e in var.value_counts(dropna=False, sort=False).items():
                 try:
                     x = int(x)
                 except:
@@ -39,6 +64,19 @@ class DDI:
                 counts[x] = e
             meta["frequencies"] = counts
 
+    def _add_code_frequencies(self, var, codes, meta):
+        # all values are labelled: one bincount on the codes instead of value_counts
+        frequencies = codes.frequencies()[0]
+        counts = {}
+        for value, frequency in zip(codes.values, frequencies):
+            if frequency > 0:
+                counts[int(value)] = int(frequency)
+        missing = int(var.isnull().sum())
+        if missing:
+            counts[np.nan] = missing
+        if len(counts) < 30:
+            meta["frequencies"] = counts
+
     def _add_basic_statistics(self, var, varname, meta):
         statistics = dict(count=len(var), missing_cases=sum(pd.isnull(var)))
         statistics["valid_cases"] = statistics["count"] - statistics["missing_cases"]
@@ -48,6 +86,9 @@ class DDI:
             statistics["max"] = var.max()
         except:
             pass
+        if varname in self.missings:
+            # frequencies of the extended missing values (., .a to .z)
+            statistics["extended_missings"] = count_missings(self.missings[varname][0])
         meta["statistics"] = statistics
 
 
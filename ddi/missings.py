@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from string import ascii_lowercase
+
+import numpy as np
+import pandas as pd
+from pandas.io.stata import StataMissingValue
+
+# Stata's extended missing values; code 0 is no missing, code i is MISSING_LABELS[i - 1]
+MISSING_LABELS = ["."] + ["." + letter for letter in ascii_lowercase]
+MISSING_CODES = {label: code for code, label in enumerate(MISSING_LABELS, 1)}
+
+# bits of "." and distance of two extended missing values in the bits of floats
+FLOAT_MISSINGS = {
+    np.dtype(np.float32): (np.int32, 0x7F000000, 2**11),
+    np.dtype(np.float64): (np.int64, 0x7FE0000000000000, 2**40),
+}
+
+# rows per chunk of read_missings: the StataMissingValue objects exist for one chunk
+MISSINGS_CHUNKSIZE = 100000
+
+
+def missing_codes(column):
+    """
+    Codes (int8) of the extended missing values in a column with StataMissingValue.
+
+    Only the missing rows are converted (one pass over their labels).
+    """
+    codes = np.zeros(len(column), dtype=np.int8)
+    numbers = pd.to_numeric(column, errors="coerce").to_numpy()
+    positions = np.flatnonzero(np.isnan(numbers))
+    labels = pd.Series(column.to_numpy()[positions], dtype=object).astype(str)
+    codes[positions] = labels.map(MISSING_CODES).fillna(0).to_numpy(dtype=np.int8)
+    return codes
+
+
+def missing_values(dtype):
+    """
+    Raw values of the extended missing values in dtype, indexed by their codes.
+    """
+    steps = np.arange(len(MISSING_LABELS))
+    if dtype in FLOAT_MISSINGS:
+        bits, base, step = FLOAT_MISSINGS[dtype]
+        values = (base + steps * step).astype(bits).view(dtype)
+    else:
+        base = StataMissingValue.get_base_missing_value(dtype)
+        values = (base + steps).astype(dtype)
+    # code 0 (no missing value) is never used
+    return np.concatenate([np.zeros(1, dtype=dtype), values])
+
+
+def count_missings(codes):
+    """
+    Frequencies of the extended missing values in codes (OrderedDict label: count).
+
+    Example:
+
+        count_missings(ddi.missings["age"][0])
+        # OrderedDict([(".", 10), (".a", 2)])
+    """
+    counts = np.bincount(codes, minlength=len(MISSING_LABELS) + 1)[1:]
+    return OrderedDict(
+        (label, int(count)) for label, count in zip(MISSING_LABELS, counts) if count
+    )
+
+
+def label_missings(codes):
+    """
+    Label of the extended missing value of every row ("" for no missing value).
+    """
+    return np.array([""] + MISSING_LABELS, dtype=object)[codes]
+
+
+def split_missings(data, dtypes):
+    """
+    Split data read with convert_missing=True into a numeric view and the missings.
+
+    The numeric view is the same as a read with convert_missing=False
+    (missing values are NaN, float32 stays float32, all other types become float64).
+    The missings are the codes (int8, see missing_codes) and the Stata dtype of every
+    variable with missing values, which is enough to restore the data (restore_missings).
+
+    Parameter:
+
+    data: DataFrame from StataReader.read(convert_missing=True)
+    dtypes: numpy dtypes of the variables (StataReader.dtyplist)
+
+    Returns the numeric view (data is changed in place) and the missings per variable.
+    """
+    missings = {}
+    for name, dtype in zip(list(data.columns), dtypes):
+        column = data[name]
+        if column.dtype != object or not isinstance(dtype, np.dtype):
+            continue
+        if dtype.kind not in "iuf":
+            continue
+        missings[name] = (missing_codes(column), dtype)
+        if dtype != np.float32:
+            dtype = np.float64
+        data[name] = pd.to_numeric(column, errors="coerce").to_numpy().astype(dtype)
+    return data, missings
+
+
+def read_missings(reader, nrows=None, columns=None, chunksize=MISSINGS_CHUNKSIZE):
+    """
+    Read a Stata file in chunks and split the missings of every chunk (split_missings).
+
+    read(convert_missing=True) builds an object column of StataMissingValue for every
+    variable with missing values, about ten times the numeric data: in chunks, this
+    intermediate never exists for the whole file.
+
+    Parameter:
+
+    reader: StataReader (pd.read_stata(..., iterator=True)) without rows read
+    nrows: Number of rows (all if None)
+    columns: Names of the variables to read (all if None)
+    chunksize: Number of rows per chunk
+
+    Returns the numeric view and the missings per variable (as split_missings).
+
+    Example:
+
+        with pd.read_stata("../input/dataset.dta", iterator=True) as reader:
+            data, missings = read_missings(reader)
+    """
+    total = reader.nobs if nrows is None else min(nrows, reader.nobs)
+    if total == 0:
+        data = reader.read(nrows, columns=columns, convert_missing=True)
+        return split_missings(data, reader.dtyplist)
+    chunks = []
+    missings = {}
+    start = 0
+    while start < total:
+        chunk = reader.read(
+            min(chunksize, total - start), columns=columns, convert_missing=True
+        )
+        chunk, codes = split_missings(chunk, reader.dtyplist)
+        # codes of a variable without missings in earlier chunks start with zeros
+        for name, (code, dtype) in codes.items():
+            if name not in missings:
+                missings[name] = (np.zeros(total, dtype=np.int8), dtype)
+            missings[name][0][start : start + len(chunk)] = code
+        chunks.append(chunk)
+        start += len(chunk)
+    if len(chunks) == 1:
+        return chunks[0], missings
+    return pd.concat(chunks), missings
+
+
+def restore_missings(data, missings):
+    """
+    Data with Stata's extended missing values (StataMissingValue) as in
+    StataReader.read(convert_missing=True).
+    """
+    stata = data.copy()
+    for name, (codes, dtype) in missings.items():
+        values = data[name].to_numpy()
+        values = np.where(np.isnan(values), 0, values).astype(dtype)
+        column = pd.Series(values, index=data.index, name=name, dtype=object)
+        raw = missing_values(dtype)
+        for code in np.unique(codes[codes > 0]):
+            column.iloc[np.flatnonzero(codes == code)] = StataMissingValue(raw[code])
+        stata[name] = column
+    return stata
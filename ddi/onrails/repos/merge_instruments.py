@@ -1,4 +1,5 @@
 import glob
+import hashlib
 import json
 import os
 from collections import OrderedDict
@@ -11,10 +12,32 @@ import pandas as pd
 def read_tables(name):
     tables = glob.glob("metadata/*/*/%s" % name)
     tables += glob.glob("metadata/%s" % name)
-    result = pd.read_csv(tables.pop())
-    for table in tables:
-        result = result.append(pd.read_csv(table))
-    return result
+    # the last table first, then the others (one concat instead of append per table)
+    tables.insert(0, tables.pop())
+    return pd.concat([pd.read_csv(table) for table in tables])
+
+
+def _records(table, columns=None):
+    """
+    Rows of table as OrderedDicts without missing values.
+
+    Same as OrderedDict(row.dropna()) for every row of iterrows(),
+    with one isna for the whole table.
+    """
+    if columns is None:
+        columns = list(table.columns)
+    values = table[columns].values
+    missing = pd.isna(values)
+    return [
+        OrderedDict(
+            [
+                (column, value)
+                for column, value, is_missing in zip(columns, row, row_missing)
+                if not is_missing
+            ]
+        )
+        for row, row_missing in zip(values, missing)
+    ]
 
 
 def import_tables():
@@ -27,21 +50,18 @@ def import_tables():
 
 
 def get_answers(tables):
+    table = tables["answers"]
+    records = _records(table)
+    # positions of the answers of every answer list, in the order of the table
+    groups = table.groupby(["questionnaire", "answer_list"], sort=False).indices
     answers = OrderedDict()
-    for i, answer in tables["answers"].iterrows():
-        answer = OrderedDict(answer.dropna())
-        key = (answer["questionnaire"], answer["answer_list"])
-        if not key in answers:
-            answers[key] = list()
-        _clean_x(answer)
-        answers[key].append(answer)
+    for key, positions in groups.items():
+        answers[key] = [_clean_x(records[i]) for i in positions]
     return answers
 
 
 def get_instruments(tables):
-    instrument_list = [
-        OrderedDict(row.dropna()) for i, row in tables["questionnaires"].iterrows()
-    ]
+    instrument_list = _records(tables["questionnaires"])
     instruments = OrderedDict([(x["questionnaire"], x) for x in instrument_list])
     for instrument in instruments.values():
         instrument["instrument"] = instrument["questionnaire"]
@@ -50,8 +70,9 @@ def get_instruments(tables):
 
 
 def fill_questions(tables, instruments, answers):
-    for i, item in tables["questions"].iterrows():
-        item = OrderedDict(item.dropna())
+    # columns with "." (duplicated columns of the csv) are not used in the items
+    columns = [column for column in tables["questions"].columns if "." not in column]
+    for item in _records(tables["questions"], columns):
         instrument_name = item["questionnaire"]
         question_name = item["question"]
         if "item" in item.keys():
@@ -89,41 +110,98 @@ def fill_questions(tables, instruments, answers):
             for key, item in qitems.items():
                 item["item"] = str(key)
                 item["number"] = str(item.get("number", ""))
-                for k in [k for k in item.keys() if "." in k]:
-                    item.pop(k)
             question["items"] = list(qitems.values())
     return instruments
 
 
 def _clean_x(x):
-    del (x["study"])
-    del (x["questionnaire"])
+    del x["study"]
+    del x["questionnaire"]
     if "answer_list" in x and not "question" in x:
-        del (x["answer_list"])
+        del x["answer_list"]
     if "question" in x:
-        del (x["question"])
+        del x["question"]
     return x
 
 
+def _hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=20).hexdigest()
+
+
+def _file_hash(path):
+    try:
+        with open(path) as f:
+            return _hash(f.read())
+    except OSError:
+        return None
+
+
+def write_files(directory, contents, extension):
+    """
+    Write (name, text) of contents into directory, only files with new content.
+
+    Files with extension which are not in contents are removed, other files are kept.
+    Returns the names of the added, changed and removed files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    summary = OrderedDict(added=[], changed=[], removed=[])
+    names = set()
+    for name, text in contents:
+        path = os.path.join(directory, name + extension)
+        names.add(name + extension)
+        old_hash = _file_hash(path)
+        if old_hash == _hash(text):
+            continue
+        with open(path, "w") as f:
+            f.write(text)
+        summary["added" if old_hash is None else "changed"].append(path)
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(extension) and file_name not in names:
+            os.remove(os.path.join(directory, file_name))
+            summary["removed"].append(os.path.join(directory, file_name))
+    print(
+        "%s: %d added, %d changed, %d removed"
+        % (
+            directory,
+            len(summary["added"]),
+            len(summary["changed"]),
+            len(summary["removed"]),
+        )
+    )
+    return summary
+
+
 def write_json(instruments):
-    os.system("rm -r ddionrails/instruments; mkdir -p ddionrails/instruments")
-    for instrument_name, instrument in instruments.items():
-        with open("ddionrails/instruments/%s.json" % instrument_name, "w") as f:
-            json.dump(instrument, f, indent=2)
+    # unchanged instruments are not written again (see write_files)
+    return write_files(
+        "ddionrails/instruments",
+        (
+            (instrument_name, json.dumps(instrument, indent=2))
+            for instrument_name, instrument in instruments.items()
+        ),
+        ".json",
+    )
 
 
 def write_yaml(instruments):
-    os.system("rm -r temp/instruments; mkdir -p temp/instruments")
-    for instrument_name, instrument in instruments.items():
-        with open("temp/instruments/%s.yaml" % instrument_name, "w") as f:
-            yaml.dump(instrument, f, default_flow_style=False)
+    return write_files(
+        "temp/instruments",
+        (
+            (instrument_name, yaml.dump(instrument, default_flow_style=False))
+            for instrument_name, instrument in instruments.items()
+        ),
+        ".yaml",
+    )
 
 
 def export(instruments, export_json=True, export_yaml=False):
+    # returns the added, changed and removed instrument files of the json export
+    summary = None
     if export_json:
-        write_json(instruments)
+        summary = write_json(instruments)
     if export_yaml:
         write_yaml(instruments)
+    return summary
 
 
 def main(export_json=True, export_yaml=False):
@@ -6,35 +6,48 @@ import pandas as pd
 LANGUAGES = dict(en="", de="_de")
 
 
+def _label(label):
+    return label if str(label) != "nan" else ""
+
+
+def _records(data):
+    # rows as dicts, as to_dict("records") without boxing every cell on its own
+    names = list(data.columns)
+    columns = [data[name].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
 class Topic:
 
     all_objects = []
 
-    def __init__(self, name=None, parent_name=None, label=None):
+    def __init__(self, name=None, parent_name=None, label=None, labels=None):
         self.name = name
         self.parent_name = parent_name
-        self.label = label if str(label) != "nan" else ""
+        self.label = _label(label)
+        # label per language (i.e. dict(en="Income", de="Einkommen"))
+        self.labels = {key: _label(value) for key, value in (labels or {}).items()}
         self.children = []
         self.concepts = []
         self.all_objects.append(self)
 
-    def to_dict(self):
-        children = [x.to_dict() for x in self.children]
-        children += [x.to_dict() for x in self.concepts]
+    def to_dict(self, language=None):
+        children = [x.to_dict(language) for x in self.children]
+        children += [x.to_dict(language) for x in self.concepts]
         return dict(
-            title=self.label,
+            title=self.labels.get(language, self.label),
             key="topic_%s" % self.name,
             type="topic",
             children=children,
         )
 
     @classmethod
-    def get_by_name(cls, name):
-        """Get topic from all_objects by name"""
-        try:
-            return [x for x in cls.all_objects if x.name == name][0]
-        except:
-            return None
+    def get_index(cls):
+        """Topics of all_objects by name (the first topic of every name)"""
+        index = dict()
+        for topic in cls.all_objects:
+            index.setdefault(topic.name, topic)
+        return index
 
     @classmethod
     def get_root_topics(cls):
@@ -43,31 +56,37 @@ class Topic:
 
     @classmethod
     def add_topics_to_parents(cls):
+        index = cls.get_index()
         for topic in cls.all_objects:
-            try:
-                parent = Topic.get_by_name(topic.parent_name)
+            parent = index.get(topic.parent_name)
+            if parent is not None:
                 parent.children.append(topic)
-            except:
-                pass
 
 
 class Concept:
 
     all_objects = []
 
-    def __init__(self, name=None, topic_name=None, label=None):
+    def __init__(self, name=None, topic_name=None, label=None, labels=None):
         self.name = name
         self.topic_name = topic_name
-        self.label = label if str(label) != "nan" else ""
+        self.label = _label(label)
+        # label per language, as Topic.labels
+        self.labels = {key: _label(value) for key, value in (labels or {}).items()}
         self.all_objects.append(self)
 
-    def to_dict(self):
-        return dict(title=self.label, key="concept_%s" % self.name, type="concept")
+    def to_dict(self, language=None):
+        return dict(
+            title=self.labels.get(language, self.label),
+            key="concept_%s" % self.name,
+            type="concept",
+        )
 
     @classmethod
     def add_concepts_to_topics(cls):
+        index = Topic.get_index()
         for concept in cls.all_objects:
-            topic = Topic.get_by_name(concept.topic_name)
+            topic = index.get(concept.topic_name)
             if topic:
                 topic.concepts.append(concept)
             else:
@@ -102,40 +121,51 @@ class TopicParser:
             f.write(json.dumps(json_dict))
 
     def _create_json(self):
+        # the tree is built once, every language only emits its labels
+        self._create_objects()
+        roots = Topic.get_root_topics()
         result = []
         for language in self.languages:
+            print("Language: %s" % language)
+            print("Topics: %s" % len(Topic.all_objects))
+            print("Concepts: %s" % len(Concept.all_objects))
             result.append(
-                dict(language=language, topics=self._convert_to_dict(language))
+                dict(
+                    language=language,
+                    topics=[topic.to_dict(language) for topic in roots],
+                )
             )
+        Topic.all_objects = []
+        Concept.all_objects = []
         return result
 
-    def _convert_to_dict(self, language):
-        for row in self.topics_data.to_dict("records"):
+    def _labels(self, row):
+        return {
+            language: row.get("label" + LANGUAGES[language], row.get("name"))
+            for language in self.languages
+        }
+
+    def _create_objects(self):
+        for row in _records(self.topics_data):
             if str(row.get("parent_name")) == "nan":
                 parent_name = None
             else:
                 parent_name = row.get("parent_name")
             Topic(
                 name=row.get("name"),
-                label=row.get("label" + LANGUAGES[language], row.get("name")),
+                labels=self._labels(row),
                 parent_name=parent_name,
             )
-        for row in self.concepts_data.to_dict("records"):
+        for row in _records(self.concepts_data):
             if str(row.get("topic_name", "nan")) != "nan":
                 Concept(
                     name=row.get("name"),
                     topic_name=row.get("topic_name"),
-                    label=row.get("label" + LANGUAGES[language], row.get("name")),
+                    labels=self._labels(row),
                 )
+        # both link through one index of the topics by name (Topic.get_index)
         Topic.add_topics_to_parents()
         Concept.add_concepts_to_topics()
-        print("Language: %s" % language)
-        print("Topics: %s" % len(Topic.all_objects))
-        print("Concepts: %s" % len(Concept.all_objects))
-        result = [topic.to_dict() for topic in Topic.get_root_topics()]
-        Topic.all_objects = []
-        Concept.all_objects = []
-        return result
 
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
 import pandas as pd
 
+from .convert.frequencies import CategoricalCodes
 from .ddi import DDI
+from .missings import read_missings
 
 
 class StataReader:
@@ -18,10 +20,10 @@ class StataReader:
         self.file_format = "Stata"
         self.ddi = DDI()
         stata_file = self._open_stata_file(path)
-        self.ddi.data = stata_file.read()
+        self._add_stata_data(stata_file)
         self.ddi.meta = self._parse_meta(stata_file)
+        self.ddi.codes = self._encode_labels(self.ddi.data, self.ddi.meta)
         stata_file.close()
-        self._add_stata_data(path)
 
     def _open_stata_file(self, path):
         stata_file = pd.read_stata(
@@ -30,24 +32,34 @@ class StataReader:
         return stata_file
 
     def _parse_meta(self, stata_file):
-        var_list = [dict(name=var, sn=sn) for sn, var in enumerate(stata_file.varlist)]
+        # every call builds a new dict: read all labels once
+        value_labels = stata_file.value_labels()
+        variable_labels = stata_file.variable_labels()
 
-        for sn, label in enumerate(stata_file.lbllist):
-            label_dict = stata_file.value_labels()
+        meta = {}
+        for sn, (name, label) in enumerate(zip(stata_file.varlist, stata_file.lbllist)):
+            var = dict(name=name, sn=sn)
             if label != "":
-                var_list[sn]["value_list"] = label
-                var_list[sn]["value_labels"] = label_dict[label]
+                var["value_list"] = label
+                var["value_labels"] = value_labels[label]
             else:
-                var_list[sn]["value_list"] = None
+                var["value_list"] = None
+            var["label"] = variable_labels[name]
+            meta[name] = var
+        return meta
 
-        for var in var_list:
-            var["label"] = stata_file.variable_labels()[var["name"]]
-        return {var["name"]: var for var in var_list}
+    def _encode_labels(self, data, meta):
+        codes = {}
+        for name, var in meta.items():
+            if var["value_list"] is not None and name in data:
+                values = list(var["value_labels"].keys())
+                codes[name] = CategoricalCodes(data[name], values)
+        return codes
 
-    def _add_stata_data(self, path):
-        stata_file = self._open_stata_file(path)
-        self.ddi.stata = stata_file.read(convert_missing=True)
-        stata_file.close()
+    def _add_stata_data(self, stata_file):
+        # one read in chunks: numeric data plus the extended missings,
+        # ddi.stata (data with StataMissingValue) is only built on request
+        self.ddi.data, self.ddi.missings = read_missings(stata_file)
 
 
 def read_stata(path):
@@ -14,6 +14,13 @@ def test():
     """
     run("python -m unittest discover")
 
+@task
+def benchmark():
+    """
+    Run micro-benchmarks.
+    """
+    run("python -m test.bench_statareader")
+
 @task
 def setup_virtualenv():
     """Setup virtualenv in: ~/.envs/data/"""
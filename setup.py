@@ -22,7 +22,7 @@ VERSION = "0.1.0"
 REQUIRED = ["jinja2", "lxml", "pandas", "pyyaml", "scipy"]
 
 # What packages are optional?
-EXTRAS = {}
+EXTRAS = {"arrow": ["pyarrow"]}
 
 
 here = os.path.abspath(os.path.dirname(__file__))
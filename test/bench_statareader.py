@@ -0,0 +1,71 @@
+"""
+Micro-benchmark for the metadata of wide Stata files.
+
+Run from the root of the repository (or with "paver benchmark"):
+
+    python -m test.bench_statareader
+"""
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ddi.statareader import StataReader
+
+WIDTHS = [500, 1000, 2000, 4000, 8000]
+
+
+def write_wide_stata(path, columns, rows=100, seed=1):
+    """
+    Write a synthetic .dta with columns variables; every second variable has value labels.
+    """
+    random = np.random.RandomState(seed)
+    data = pd.DataFrame(
+        random.randint(-2, 5, size=(rows, columns)).astype(np.int8),
+        columns=["v%05d" % i for i in range(columns)],
+    )
+    variable_labels = {name: "Label of %s" % name for name in data.columns}
+    value_labels = {
+        name: {i: "Value %d" % i for i in range(-2, 5)} for name in data.columns[::2]
+    }
+    data.to_stata(
+        path,
+        write_index=False,
+        variable_labels=variable_labels,
+        value_labels=value_labels,
+        version=118,
+    )
+
+
+def bench_parse_meta(columns, directory):
+    path = os.path.join(directory, "wide_%d.dta" % columns)
+    write_wide_stata(path, columns)
+    reader = StataReader.__new__(StataReader)
+    stata_file = reader._open_stata_file(path)
+    stata_file.read()
+    start = time.perf_counter()
+    meta = reader._parse_meta(stata_file)
+    seconds = time.perf_counter() - start
+    stata_file.close()
+    assert len(meta) == columns
+    return seconds
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        for columns in WIDTHS:
+            seconds = bench_parse_meta(columns, directory)
+            print(
+                "%5d variables: %8.4f s (%6.2f us per variable)"
+                % (columns, seconds, seconds / columns * 1e6)
+            )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
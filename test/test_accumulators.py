@@ -0,0 +1,181 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import accumulators, write_stats
+from ddi.convert.accumulators import (
+    DistinctCount,
+    NumberAccumulator,
+    StringAccumulator,
+    ValueCounts,
+)
+from ddi.convert.profile import ColumnProfile
+from ddi.convert.quantiles import summary
+from ddi.convert.read_stata import StataChunks, read_stata
+
+
+def write_example_stata(path, rows=2000, seed=3):
+    random = np.random.RandomState(seed)
+    data = pd.DataFrame(
+        dict(
+            wave=random.choice([1, 2, 3], rows).astype(np.int8),
+            sat=random.choice([-2, -1, 0, 1, 2, 3], rows).astype(np.int8),
+            inc=np.where(
+                random.uniform(size=rows) > 0.2,
+                random.lognormal(7, 1, rows),
+                random.choice([-1, -3], rows),
+            ),
+            text=random.choice(["a", "b", "-1", "", "c"], rows),
+            weight=random.uniform(0.5, 3, rows),
+        )
+    )
+    data.to_stata(
+        path,
+        write_index=False,
+        value_labels=dict(
+            wave={1: "a", 2: "b", 3: "c"},
+            sat={-2: "x", -1: "y", 0: "0", 1: "1", 2: "2", 3: "3"},
+        ),
+        version=118,
+    )
+
+
+def statistics(path, chunksize=None, split="", weight="", density_mode="kde"):
+    data, metadata = read_stata(path, chunksize=chunksize)
+    args = ("d", data, metadata, "", "", split, weight, "", "", "", "", "")
+    if chunksize is None:
+        return write_stats.generate_stat(*args, density_mode=density_mode)
+    return list(write_stats.iter_chunked_stat(*args, density_mode=density_mode))
+
+
+class TestAccumulators(unittest.TestCase):
+    def test_value_counts_overflow(self):
+        counts = ValueCounts(max_distinct=3)
+        counts.add(np.array([1, 2, 2]))
+        counts.add(np.array([3, 3]))
+        self.assertEqual(counts.values.tolist(), [1, 2, 3])
+        self.assertEqual(counts.counts.tolist(), [1, 2, 2])
+        counts.add(np.array([4]))
+        self.assertTrue(counts.overflow)
+        self.assertIsNone(counts.values)
+
+    def test_chunks_equal_single_pass(self):
+        random = np.random.RandomState(1)
+        column = pd.Series(random.choice([-2, -1, 0.5, 1.5, 7, 11], 500))
+        single = NumberAccumulator()
+        single.add(ColumnProfile(column))
+        chunked = NumberAccumulator()
+        for start in range(0, 500, 120):
+            chunked.add(ColumnProfile(column.iloc[start : start + 120]))
+        self.assertEqual(chunked.missings, single.missings)
+        self.assertEqual(
+            list(chunked.summary().values()), list(single.summary().values())
+        )
+        self.assertAlmostEqual(chunked.m2, single.m2)
+
+    def test_distinct_count(self):
+        counts = DistinctCount(max_distinct=1000)
+        for start in range(0, 900, 100):
+            counts.add(np.array(["v%d" % (i % 600) for i in range(start, start + 100)]))
+        self.assertFalse(counts.overflow)
+        self.assertEqual(counts.count(), 600)
+        for start in range(0, 20000, 1000):
+            counts.add(np.array(["v%d" % i for i in range(start, start + 1000)]))
+        self.assertTrue(counts.overflow)
+        self.assertEqual(len(counts.values), 0)
+        self.assertEqual(len(counts.hashes), 1000)
+        self.assertLess(abs(counts.count() - 20000), 20000 * 0.1)
+
+    def test_strings_as_in_memory(self):
+        column = pd.Series(["a", "b", np.nan, "-1", "", "a", "x-2", np.nan] * 50)
+        accumulator = StringAccumulator(write_stats.string_missing_mask)
+        for start in range(0, len(column), 30):
+            accumulator.add(column.iloc[start : start + 30])
+        expected = write_stats.uni_string(dict(name="s"), pd.DataFrame(dict(s=column)))
+        self.assertEqual(
+            list(accumulator.distinct_counts()),
+            [expected["frequencies"][0], expected["missings"][0]],
+        )
+        self.assertEqual(accumulator.size, len(column))
+
+    def test_summary_as_in_memory(self):
+        column = pd.Series([3.0, -1, 1, np.nan, 2, 5, 4, -2])
+        accumulator = NumberAccumulator()
+        accumulator.add(ColumnProfile(column))
+        self.assertEqual(
+            list(accumulator.summary().values()),
+            list(summary(column).values()),
+        )
+
+
+class TestChunkedStatistics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "example.dta")
+        write_example_stata(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_close(self, expected, result):
+        self.assertEqual(type(expected), type(result))
+        if isinstance(expected, dict):
+            self.assertEqual(list(expected.keys()), list(result.keys()))
+            for key in expected:
+                self.assert_close(expected[key], result[key])
+        elif isinstance(expected, list):
+            self.assertEqual(len(expected), len(result))
+            for x, y in zip(expected, result):
+                self.assert_close(x, y)
+        elif isinstance(expected, float):
+            self.assertTrue(np.isclose(expected, result, equal_nan=True))
+        elif isinstance(expected, str) and expected != result:
+            self.assertAlmostEqual(float(expected), float(result))
+        else:
+            self.assertEqual(expected, result)
+
+    def test_chunks(self):
+        chunks, _ = read_stata(self.path, chunksize=300)
+        self.assertIsInstance(chunks, StataChunks)
+        self.assertEqual([len(chunk) for chunk in chunks], [300] * 6 + [200])
+
+    def test_chunks_metadata(self):
+        _, metadata = read_stata(self.path, chunksize=300)
+        self.assertEqual(metadata, read_stata(self.path)[1])
+
+    def test_chunks_ignored_parameters(self):
+        chunks, metadata = read_stata(self.path, chunksize=300)
+        filename = os.path.join(self.directory, "example_stats.json")
+        with self.assertLogs(write_stats.logger, "WARNING") as logs:
+            write_stats.write_stats(chunks, metadata, filename, jobs=2, missings={})
+        self.assertIn("jobs, missings not used", logs.output[0])
+
+    def test_same_as_in_memory(self):
+        for split, weight in [("", ""), ("wave", "weight")]:
+            for density_mode in ["kde", "histogram"]:
+                self.assert_close(
+                    statistics(self.path, None, split, weight, density_mode),
+                    statistics(self.path, 300, split, weight, density_mode),
+                )
+
+    def test_overflow(self):
+        max_distinct = accumulators.MAX_DISTINCT
+        accumulators.MAX_DISTINCT = 50
+        try:
+            chunked = statistics(self.path, 300, "wave", "weight")
+        finally:
+            accumulators.MAX_DISTINCT = max_distinct
+        expected = statistics(self.path, None, "wave", "weight")
+        for stat, expected_stat in zip(chunked, expected):
+            if stat["scale"] != "num":
+                self.assertEqual(stat["uni"], expected_stat["uni"])
+                continue
+            for key in ["min", "max", "total", "valid", "missing"]:
+                self.assertEqual(stat["uni"][key], expected_stat["uni"][key])
+            np.testing.assert_allclose(
+                stat["uni"]["density"], expected_stat["uni"]["density"], rtol=0.05
+            )
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ddi.convert import batch
+from ddi.convert.batch import batch_statistics
+from ddi.convert.stata_to_statistics import stata_to_statistics
+from test.test_accumulators import write_example_stata
+
+
+class TestBatchStatistics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, "input", "")
+        self.output = os.path.join(self.directory, "output", "")
+        os.mkdir(self.input)
+        os.mkdir(self.output)
+        write_example_stata(self.input + "small.dta", 100)
+        write_example_stata(self.input + "large.dta", 500)
+        self.csv = os.path.join(self.directory, "datasets.csv")
+        with open(self.csv, "w") as csv_file:
+            csv_file.write("filename,weight,split,analysis_unit,period,sub_type\n")
+            for name in ["small", "large", "missing"]:
+                csv_file.write(name + ",weight,wave,p,2020,raw\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_batch(self, jobs=1):
+        return batch_statistics("study", self.csv, self.input, self.output, jobs=jobs)
+
+    def test_resume(self):
+        self.assertEqual(self.run_batch(), ["large", "small"])
+        self.assertEqual(self.run_batch(), [])
+        # a new modification time with the same content is not a change
+        os.utime(self.input + "small.dta", ns=(0, 10**18))
+        self.assertEqual(self.run_batch(), [])
+        write_example_stata(self.input + "small.dta", 100, seed=4)
+        self.assertEqual(self.run_batch(), ["small"])
+        os.remove(self.output + "large_stats.json")
+        self.assertEqual(self.run_batch(), ["large"])
+
+    def test_hash_only_changed(self):
+        self.run_batch()
+        with mock.patch.object(batch, "file_hash", wraps=batch.file_hash) as hashed:
+            # output removed, inputs unchanged: the hashes of the manifest are kept
+            os.remove(self.output + "large_stats.json")
+            self.assertEqual(self.run_batch(), ["large"])
+            self.assertEqual(hashed.call_count, 0)
+            # a changed file is hashed once (by Manifest.fresh)
+            write_example_stata(self.input + "small.dta", 100, seed=4)
+            self.assertEqual(self.run_batch(), ["small"])
+            self.assertEqual(hashed.call_count, 1)
+        self.assertEqual(self.run_batch(), [])
+
+    def test_same_output(self):
+        self.assertEqual(sorted(self.run_batch(jobs=2)), ["large", "small"])
+        expected = os.path.join(self.directory, "expected", "")
+        os.mkdir(expected)
+        stata_to_statistics("study", self.csv, self.input, expected)
+        for name in ["small", "large"]:
+            with open(self.output + name + "_stats.json") as output_file:
+                with open(expected + name + "_stats.json") as expected_file:
+                    self.assertEqual(output_file.read(), expected_file.read())
@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+import yaml
+
+from ddi.convert import write_stats
+from ddi.convert.cache import StatsCache, fingerprint
+from test.test_write_stats import example_data
+
+
+class TestStatsCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data, self.metadata = example_data()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def generate(self, cache=None):
+        return write_stats.generate_stat(
+            "example",
+            self.data,
+            self.metadata,
+            "",
+            "",
+            "wave",
+            "weight",
+            "",
+            "",
+            "",
+            "",
+            "",
+            cache=cache,
+        )
+
+    def test_fingerprint(self):
+        column = pd.Series([1, 2, 3])
+        self.assertEqual(fingerprint(column), fingerprint(column.copy()))
+        self.assertNotEqual(fingerprint(column), fingerprint(column.astype(float)))
+        self.assertNotEqual(fingerprint(column), fingerprint(pd.Series([1, 2, 4])))
+
+    def test_reuse(self):
+        expected = self.generate()
+        cache = StatsCache(self.directory)
+        self.assertEqual(self.generate(cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 5))
+        cache = StatsCache(self.directory)
+        self.assertEqual(self.generate(cache), expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 0))
+
+    def test_json_entries(self):
+        expected = self.generate()
+        self.generate(StatsCache(self.directory))
+        names = os.listdir(self.directory)
+        self.assertTrue(all(name.endswith(".json") for name in names))
+        for name in names:
+            with open(os.path.join(self.directory, name)) as cache_file:
+                json.load(cache_file)
+        # the same json and yaml as without the cache
+        cached = self.generate(StatsCache(self.directory))
+        self.assertEqual(json.dumps(cached), json.dumps(expected))
+        self.assertEqual(yaml.dump(cached), yaml.dump(expected))
+        # a broken entry is a miss
+        with open(os.path.join(self.directory, names[0]), "w") as cache_file:
+            cache_file.write("{")
+        cache = StatsCache(self.directory)
+        self.assertIsNone(cache.get(names[0][: -len(".json")]))
+        self.assertEqual(cache.misses, 1)
+
+    def test_lazy_get(self):
+        expected = self.generate(StatsCache(self.directory))
+        cache = StatsCache(self.directory)
+        stat = write_stats.iter_stat(
+            "example",
+            self.data,
+            self.metadata,
+            "",
+            "",
+            "wave",
+            "weight",
+            "",
+            "",
+            "",
+            "",
+            "",
+            cache=cache,
+        )
+        # only the statistics of the first variable are loaded for the first result
+        self.assertEqual(next(stat), expected[0])
+        self.assertEqual(cache.hits, 1)
+        # entries removed after the lookup are computed again
+        for entry in os.scandir(self.directory):
+            os.remove(entry.path)
+        self.assertEqual(list(stat), expected[1:])
+
+    def test_changes(self):
+        cache = StatsCache(self.directory)
+        self.generate(cache)
+        fields = self.metadata["resources"][0]["schema"]["fields"]
+        fields[1]["label"] = "Changed"
+        self.data.loc[0, "text"] = "changed"
+        cache = StatsCache(self.directory)
+        result = self.generate(cache)
+        self.assertEqual((cache.hits, cache.misses), (3, 2))
+        self.assertEqual(result[1]["label"], "Changed")
+        # the split variable is used by all variables
+        self.data.loc[0, "wave"] = 4.0
+        cache = StatsCache(self.directory)
+        self.generate(cache)
+        self.assertEqual(cache.hits, 0)
+
+    def test_eviction(self):
+        cache = StatsCache(self.directory)
+        self.generate(cache)
+        sizes = sorted(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+        )
+        cache = StatsCache(self.directory, max_size=sizes[-1] + sizes[-2])
+        cache.put("new", dict(name="new"))
+        self.assertLessEqual(cache.size, cache.max_size)
+        self.assertIsNotNone(cache.get("new"))
+        self.assertLessEqual(len(os.listdir(self.directory)), 3)
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.columnar import read_columnar, write_columnar
+from ddi.convert.read_stata import read_stata
+from ddi.dataset import Dataset
+from test.test_accumulators import write_example_stata
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "example")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        data = pd.DataFrame(
+            dict(
+                x=np.array([1.5, np.nan, -1.0], dtype=np.float32),
+                n=[1, 2, 3],
+                s=["a", None, "a"],
+                mixed=[1, "b", np.nan],
+            )
+        )
+        metadata = dict(name="example", resources=[dict(schema=dict(fields=[]))])
+        write_columnar(data, metadata, self.path)
+        d, m = read_columnar(self.path)
+        self.assertEqual(m, metadata)
+        self.assertTrue(d.equals(data))
+        self.assertEqual(d["x"].dtype, np.float32)
+        self.assertIsInstance(d["n"].to_numpy().base, np.memmap)
+
+    def test_statistics(self):
+        dta_name = os.path.join(self.directory, "example.dta")
+        write_example_stata(dta_name)
+        data, metadata = read_stata(dta_name)
+        dataset = Dataset()
+        dataset.dataset, dataset.metadata = data, metadata
+        dataset.write_columnar(self.path)
+        dataset = Dataset()
+        dataset.read_columnar(self.path, columns=["inc"], split="wave")
+        self.assertEqual(list(dataset.dataset.columns), ["wave", "inc"])
+        args = ("", "", "wave", "", "", "", "", "", "")
+        expected = write_stats.generate_stat("d", data, metadata, *args)
+        stat = write_stats.generate_stat(
+            "d", dataset.dataset, dataset.metadata, *args, columns=["inc"]
+        )
+        self.assertEqual(
+            json.dumps(stat), json.dumps([x for x in expected if x["name"] == "inc"])
+        )
+
+    def test_empty(self):
+        data = pd.DataFrame(dict(x=np.array([], dtype=np.float64)))
+        write_columnar(data, dict(), self.path)
+        d, _ = read_columnar(self.path)
+        self.assertEqual(len(d), 0)
+        self.assertEqual(d["x"].dtype, np.float64)
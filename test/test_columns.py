@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ddi.convert import write_stats
+from ddi.convert.columns import select_columns, select_fields
+from ddi.convert.read_stata import read_stata
+from ddi.convert.read_tdp import read_tdp
+from ddi.convert.write_tdp import write_tdp
+from ddi.dataset import Dataset
+from test.test_accumulators import write_example_stata
+
+
+def field_names(metadata):
+    return [elem["name"] for elem in metadata["resources"][0]["schema"]["fields"]]
+
+
+def statistics(data, metadata, columns=None):
+    return write_stats.generate_stat(
+        "d",
+        data,
+        metadata,
+        "",
+        "",
+        "wave",
+        "weight",
+        "",
+        "",
+        "",
+        "",
+        "",
+        columns=columns,
+    )
+
+
+class TestSelectColumns(unittest.TestCase):
+    def test_split_and_weight(self):
+        names = ["wave", "sat", "inc", "text", "weight"]
+        self.assertEqual(
+            select_columns(names, ["text", "inc"], "wave", "weight"),
+            ["wave", "inc", "text", "weight"],
+        )
+        self.assertEqual(select_columns(names), names)
+        self.assertEqual(select_columns(names, ["inc"], float("nan")), ["inc"])
+
+    def test_select_fields(self):
+        metadata = dict(
+            name="d",
+            resources=[dict(schema=dict(fields=[dict(name="a"), dict(name="b")]))],
+        )
+        selected = select_fields(metadata, ["b"])
+        self.assertEqual(field_names(selected), ["b"])
+        self.assertEqual(field_names(metadata), ["a", "b"])
+
+
+class TestReadColumns(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "example.dta")
+        write_example_stata(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_read_stata(self):
+        data, metadata = read_stata(self.path)
+        d, m = read_stata(self.path, columns=["inc", "sat"], split="wave")
+        self.assertEqual(list(d.columns), ["wave", "sat", "inc"])
+        self.assertEqual(field_names(m), ["wave", "sat", "inc"])
+        fields = metadata["resources"][0]["schema"]["fields"]
+        self.assertEqual(m["resources"][0]["schema"]["fields"], fields[:3])
+        self.assertTrue(d.equals(data[["wave", "sat", "inc"]]))
+
+    def test_read_tdp(self):
+        data, metadata = read_stata(self.path)
+        csv_name = os.path.join(self.directory, "example.csv")
+        json_name = os.path.join(self.directory, "example.json")
+        write_tdp(data, metadata, csv_name, json_name)
+        d, m = read_tdp(csv_name, json_name, columns=["text"], weight="weight")
+        self.assertEqual(list(d.columns), ["text", "weight"])
+        self.assertEqual(field_names(m), ["text", "weight"])
+
+    def test_statistics(self):
+        data, metadata = read_stata(self.path)
+        expected = [
+            stat for stat in statistics(data, metadata) if stat["name"] == "inc"
+        ]
+        d, m = read_stata(self.path, columns=["inc"], split="wave", weight="weight")
+        self.assertEqual(statistics(d, m, ["inc"]), expected)
+        chunks, m = read_stata(
+            self.path, 500, columns=["inc"], split="wave", weight="weight"
+        )
+        stat = list(
+            write_stats.iter_chunked_stat(
+                "d",
+                chunks,
+                m,
+                "",
+                "",
+                "wave",
+                "weight",
+                "",
+                "",
+                "",
+                "",
+                "",
+                columns=["inc"],
+            )
+        )
+        self.assertEqual([x["name"] for x in stat], ["inc"])
+
+    def test_dataset(self):
+        dataset = Dataset()
+        dataset.read_stata(self.path, columns=["sat"], split="wave")
+        output = os.path.join(self.directory, "example.json")
+        dataset.write_stats(output, split="wave")
+        with open(output) as json_file:
+            self.assertIn('"name": "sat"', json_file.read())
+        self.assertEqual(set(dataset.codes), {"wave", "sat"})
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy.stats import gaussian_kde
+
+from ddi.convert import density
+from ddi.convert.write_stats import uni_number
+
+
+class TestDensity(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.samples = [
+            random.normal(50, 10, 5000),
+            random.lognormal(7, 1, 5000),
+            random.randint(0, 100, 5000).astype(float),
+            np.array([1.0, 2.0, 2.0, 3.0, 10.0]),
+        ]
+
+    def test_binned_kde_matches_scipy(self):
+        for values in self.samples:
+            points = np.linspace(values.min(), values.max(), 20)
+            expected = gaussian_kde(values).evaluate(points)
+            result = density.binned_kde(values, points)
+            np.testing.assert_allclose(
+                result, expected, rtol=1e-3, atol=1e-4 * expected.max()
+            )
+
+    def test_histogram_integrates_to_one(self):
+        for values in self.samples:
+            result, min_val, max_val, by = density.density(values, mode="histogram")
+            self.assertAlmostEqual(sum(result) * by, 1.0)
+
+    def test_without_density(self):
+        self.assertEqual(density.density(np.array([])), ([], [], [], 0))
+        self.assertEqual(density.density(np.array([3.0, 3.0])), ([], 3.0, 3.0, 0))
+
+    def test_uni_number(self):
+        column = pd.Series([-1, -2, np.nan, 4, 10, 5, 5, 7], dtype="float32")
+        file_csv = pd.DataFrame(dict(x=column))
+        elem = dict(name="x", type="number")
+        result = uni_number(elem, file_csv, "")
+        expected = uni_number(elem, file_csv, "", density_mode="exact")
+        self.assertEqual(list(result.keys()), list(expected.keys()))
+        self.assertEqual(result["min"], 4.0)
+        self.assertEqual(result["max"], 10.0)
+        self.assertEqual(result["by"], expected["by"])
+        np.testing.assert_allclose(result["density"], expected["density"], rtol=1e-3)
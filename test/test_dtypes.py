@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.dtypes import compact_column, compact_dtypes
+from ddi.convert.read_stata import read_stata
+from ddi.dataset import Dataset
+from test.test_accumulators import write_example_stata
+
+
+class TestCompactColumn(unittest.TestCase):
+    def test_integers(self):
+        self.assertEqual(compact_column(pd.Series([-3, 100])).dtype, np.int8)
+        self.assertEqual(compact_column(pd.Series([-3, 1000])).dtype, np.int16)
+
+    def test_floats_kept(self):
+        column = pd.Series([1.0, np.nan, 3.0])
+        self.assertEqual(compact_column(column).dtype, np.float64)
+
+    def test_strings(self):
+        column = pd.Series(["a", "b", None, "a"] * 3)
+        self.assertEqual(compact_column(column).dtype, "category")
+        self.assertEqual(compact_column(column, "number").dtype, object)
+        distinct = pd.Series(["a", "b", "c"])
+        self.assertEqual(compact_column(distinct).dtype, object)
+        mixed = pd.Series(["a", 1] * 3)
+        self.assertEqual(compact_column(mixed).dtype, object)
+
+
+class TestCompactDtypes(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "example.dta")
+        write_example_stata(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_same_statistics(self):
+        data, metadata = read_stata(self.path)
+        data["count"] = np.arange(len(data), dtype=np.int64) % 50 - 2
+        metadata["resources"][0]["schema"]["fields"].append(
+            dict(name="count", label="count", type="number")
+        )
+        fields = metadata["resources"][0]["schema"]["fields"]
+        compact, (before, after) = compact_dtypes(data, fields)
+        self.assertLess(after, before)
+        self.assertEqual(compact["text"].dtype, "category")
+        self.assertEqual(compact["count"].dtype, np.int8)
+        for density_mode in ["kde", "histogram"]:
+            args = ("", "", "wave", "weight", "", "", "", "", "", density_mode)
+            self.assertEqual(
+                json.dumps(write_stats.generate_stat("d", data, metadata, *args)),
+                json.dumps(write_stats.generate_stat("d", compact, metadata, *args)),
+            )
+
+    def test_dataset(self):
+        dataset = Dataset()
+        dataset.read_stata(self.path, compact_dtypes=True)
+        before, after = dataset.memory
+        self.assertLess(after, before)
+        self.assertEqual(dataset.dataset["text"].dtype, "category")
+        self.assertEqual(set(dataset.codes), {"wave", "sat"})
+
+    def test_dataset_chunks(self):
+        dataset = Dataset()
+        with self.assertLogs("ddi.dataset", "WARNING") as logs:
+            dataset.read_stata(self.path, chunksize=300, compact_dtypes=True)
+        self.assertIn("compact_dtypes not used with chunksize", logs.output[0])
+        self.assertIsNone(dataset.codes)
+
+    def test_labels_outside_compact_dtype(self):
+        data = pd.DataFrame(dict(c=np.arange(40) % 3))
+        fields = [
+            dict(
+                name="c",
+                label="c",
+                type="cat",
+                values=[dict(value=v, label=str(v)) for v in [0, 1, 2, 1000]],
+            )
+        ]
+        metadata = dict(name="d", resources=[dict(schema=dict(fields=fields))])
+        compact, _ = compact_dtypes(data, fields)
+        self.assertEqual(compact["c"].dtype, np.int8)
+        args = ("", "", "", "", "", "", "", "", "")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            stat = write_stats.generate_stat("d", compact, metadata, *args)
+        self.assertEqual(
+            json.dumps(stat),
+            json.dumps(write_stats.generate_stat("d", data, metadata, *args)),
+        )
+        self.assertEqual(len(stat), 1)
+
+    def test_edited_after_read(self):
+        dataset = Dataset()
+        dataset.read_stata(self.path, compact_dtypes=True)
+        self.assertIn("sat", dataset.codes)
+        dataset.dataset.loc[dataset.dataset["sat"] == 1, "sat"] = 2
+        sat = [
+            field
+            for field in dataset.metadata["resources"][0]["schema"]["fields"]
+            if field["name"] == "sat"
+        ][0]
+        sat["values"] = [value for value in sat["values"] if value["value"] != 3]
+        args = ("", "", "wave", "", "", "", "", "", "")
+        expected = write_stats.generate_stat(
+            "d", dataset.dataset, dataset.metadata, *args
+        )
+        stat = write_stats.generate_stat(
+            "d", dataset.dataset, dataset.metadata, *args, codes=dataset.codes
+        )
+        self.assertEqual(json.dumps(stat), json.dumps(expected))
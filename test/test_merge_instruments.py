@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ddi.onrails.repos import merge_instruments
+
+
+class TestMergeInstruments(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        os.makedirs("metadata/s/a")
+        pd.DataFrame(dict(questionnaire=["q1"], label=["Q1"])).to_csv(
+            "metadata/questionnaires.csv", index=False
+        )
+        pd.DataFrame(
+            dict(
+                study="s",
+                questionnaire=["q1", "q1", "q1", "q2"],
+                question=["f1", "f1", "f2", "f1"],
+                item=["a", "b", None, None],
+                text=["t", None, "u", "v"],
+                answer_list=[1, 1, None, 1],
+            )
+        ).to_csv("metadata/s/a/questions.csv", index=False)
+        pd.DataFrame(
+            dict(
+                study="s",
+                questionnaire=["q1", "q1", "q2"],
+                answer_list=[1, 1, 1],
+                value=[1, 2, 3],
+                label=["yes", None, "no"],
+            )
+        ).to_csv("metadata/answers.csv", index=False)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_instruments(self):
+        instruments = merge_instruments.main()
+        self.assertEqual(list(instruments), ["q1", "q2"])
+        with open("ddionrails/instruments/q1.json") as json_file:
+            q1 = json.load(json_file)
+        self.assertEqual(q1["label"], "Q1")
+        self.assertEqual(list(q1["questions"]), ["f1", "f2"])
+        items = q1["questions"]["f1"]["items"]
+        self.assertEqual([item["item"] for item in items], ["a", "b"])
+        self.assertEqual(q1["questions"]["f1"]["label"], "t")
+        self.assertEqual(
+            items[0]["answers"], [dict(value=1, label="yes"), dict(value=2)]
+        )
+        self.assertEqual(
+            items[1],
+            dict(
+                answer_list=1.0, answers=items[0]["answers"], sn=1, item="b", number=""
+            ),
+        )
+        self.assertNotIn("answers", q1["questions"]["f2"]["items"][0])
+        self.assertEqual(q1["questions"]["f2"]["items"][0]["item"], "root")
+
+    def test_incremental_export(self):
+        instruments = merge_instruments.main()
+        with open("ddionrails/instruments/other.txt", "w") as f:
+            f.write("kept")
+        os.utime("ddionrails/instruments/q2.json", ns=(0, 0))
+        summary = merge_instruments.export(instruments)
+        self.assertEqual(summary, dict(added=[], changed=[], removed=[]))
+        self.assertEqual(os.stat("ddionrails/instruments/q2.json").st_mtime_ns, 0)
+        instruments["q1"]["label"] = "new"
+        instruments["q3"] = dict(instrument="q3", questions=dict())
+        del instruments["q2"]
+        summary = merge_instruments.export(instruments)
+        self.assertEqual(
+            summary,
+            dict(
+                added=["ddionrails/instruments/q3.json"],
+                changed=["ddionrails/instruments/q1.json"],
+                removed=["ddionrails/instruments/q2.json"],
+            ),
+        )
+        self.assertEqual(
+            sorted(os.listdir("ddionrails/instruments")),
+            ["other.txt", "q1.json", "q3.json"],
+        )
+        with open("ddionrails/instruments/q1.json") as json_file:
+            self.assertEqual(json.load(json_file)["label"], "new")
@@ -0,0 +1,87 @@
+import glob
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.read_stata import read_stata, read_stata_missings
+from ddi.dataset import Dataset
+from ddi.missings import (
+    count_missings,
+    label_missings,
+    read_missings,
+    restore_missings,
+    split_missings,
+)
+
+
+def read(path, convert_missing):
+    stata_file = pd.read_stata(
+        path, convert_categoricals=False, order_categoricals=False, iterator=True
+    )
+    data = stata_file.read(convert_missing=convert_missing)
+    dtypes = stata_file.dtyplist
+    stata_file.close()
+    return data, dtypes
+
+
+class TestMissings(unittest.TestCase):
+    def test_split_and_restore(self):
+        for path in sorted(glob.glob("test/data/*.dta")):
+            numeric, _ = read(path, False)
+            stata, _ = read(path, True)
+            data, missings = split_missings(*read(path, True))
+            pd.testing.assert_frame_equal(data, numeric)
+            restored = restore_missings(data, missings)
+            pd.testing.assert_frame_equal(restored, stata)
+            for name in stata:
+                self.assertEqual(
+                    [str(x) for x in restored[name]], [str(x) for x in stata[name]]
+                )
+
+    def test_read_in_chunks(self):
+        for path in sorted(glob.glob("test/data/*.dta")):
+            numeric, _ = read(path, False)
+            _, expected = split_missings(*read(path, True))
+            for chunksize in [1, 3, len(numeric) + 1]:
+                with pd.read_stata(
+                    path, convert_categoricals=False, iterator=True
+                ) as reader:
+                    data, missings = read_missings(reader, chunksize=chunksize)
+                pd.testing.assert_frame_equal(data, numeric)
+                self.assertEqual(set(missings), set(expected))
+                for name, (codes, dtype) in expected.items():
+                    np.testing.assert_array_equal(missings[name][0], codes)
+                    self.assertEqual(missings[name][1], dtype)
+
+    def test_codes(self):
+        data, missings = split_missings(*read("test/data/test2.dta", True))
+        codes, dtype = missings["inc"]
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertEqual(dtype, np.float32)
+        self.assertEqual(list(count_missings(codes)), [".", ".a", ".b", ".z"])
+        labels = label_missings(codes)
+        self.assertTrue((labels != "").sum() == data["inc"].isnull().sum())
+        self.assertEqual(set(labels), {"", ".", ".a", ".b", ".z"})
+
+    def test_statistics(self):
+        path = "test/data/test2.dta"
+        data, metadata, missings = read_stata_missings(path)
+        numeric, _ = read_stata(path)
+        pd.testing.assert_frame_equal(data, numeric)
+        args = ("", "", "", "", "", "", "", "", "")
+        expected = write_stats.generate_stat("d", data, metadata, *args)
+        stat = write_stats.generate_stat("d", data, metadata, *args, missings=missings)
+        for elem, expected_elem in zip(stat, expected):
+            extended = elem["uni"].pop("extended_missings", None)
+            self.assertEqual(elem, expected_elem)
+            if elem["name"] in missings:
+                counts = count_missings(missings[elem["name"]][0])
+                self.assertEqual(extended["labels"], list(counts))
+                self.assertEqual(extended["frequencies"], list(counts.values()))
+            else:
+                self.assertIsNone(extended)
+        dataset = Dataset()
+        dataset.read_stata(path, extended_missings=True)
+        self.assertEqual(set(dataset.missings), {"sex", "inc"})
@@ -0,0 +1,80 @@
+import json
+import multiprocessing
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.parallel import SharedFrame, attach_frame
+
+
+def attached_values(spec):
+    data, blocks = attach_frame(spec)
+    values = {name: data[name].tolist() for name in data}
+    for block in blocks:
+        block.close()
+    return values
+
+
+def column_values(column):
+    return [None if pd.isna(value) else value for value in column]
+
+
+def example_frame():
+    return pd.DataFrame(
+        dict(
+            x=[1.5, np.nan, 3.0, 4.0],
+            s=["a", None, "b", "a"],
+            n=pd.array([1, None, 2, 2], dtype="Int64"),
+            flag=pd.array([True, None, False, True], dtype="boolean"),
+            c=pd.Categorical(["u", "v", None, "u"]),
+        )
+    )
+
+
+class TestSharedFrame(unittest.TestCase):
+    def test_round_trip(self):
+        data = example_frame()
+        with SharedFrame(data) as shared:
+            attached, blocks = attach_frame(shared.spec)
+            for name in data:
+                self.assertEqual(
+                    column_values(attached[name]), column_values(data[name])
+                )
+            self.assertEqual(attached["n"].dtype, "Int64")
+            self.assertEqual(attached["flag"].dtype, "boolean")
+            # strings are Categoricals on the shared codes, not object arrays
+            self.assertEqual(attached["s"].dtype, "category")
+            self.assertFalse(attached["s"].cat.codes.to_numpy().flags.writeable)
+            del attached
+            for block in blocks:
+                block.close()
+
+    def test_spawn(self):
+        # only the spec is sent, no pointers into the memory of the parent
+        data = example_frame()[["x", "s", "n"]]
+        context = multiprocessing.get_context("spawn")
+        with SharedFrame(data) as shared:
+            with context.Pool(1) as pool:
+                values = pool.apply(attached_values, (shared.spec,))
+        self.assertEqual(values["s"][0], "a")
+        self.assertTrue(pd.isna(values["n"][1]))
+        self.assertEqual(values["n"][2], 2)
+
+    def test_extension_dtypes(self):
+        data = pd.DataFrame(
+            dict(
+                n=pd.array(np.arange(200) % 5, dtype="Int64"),
+                s=np.where(np.arange(200) % 3, "a", "b"),
+            )
+        )
+        fields = [
+            dict(name="n", label="n", type="number"),
+            dict(name="s", label="s", type="string"),
+        ]
+        metadata = dict(name="d", resources=[dict(schema=dict(fields=fields))])
+        args = ("", "", "", "", "", "", "", "", "")
+        serial = write_stats.generate_stat("d", data, metadata, *args)
+        parallel = write_stats.generate_stat("d", data, metadata, *args, jobs=2)
+        self.assertEqual(json.dumps(parallel), json.dumps(serial))
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.profile import ColumnProfile, column_profile
+
+
+class TestColumnProfile(unittest.TestCase):
+    def test_views(self):
+        profile = ColumnProfile(pd.Series([3, -1, 1, np.nan, -2, -1, 2]))
+        self.assertEqual(profile.valid.tolist(), [3, 1, 2])
+        self.assertEqual(profile.sorted_valid.tolist(), [1, 2, 3])
+        self.assertEqual(profile.n_valid, 3)
+        self.assertEqual(profile.null_count, 1)
+        missing_values, counts = profile.missings
+        self.assertEqual(missing_values.tolist(), [-1, -2])
+        self.assertEqual(counts.tolist(), [2, 1])
+
+    def test_object_column(self):
+        column = pd.Series(["1", "-1", None, "2.5"], dtype=object)
+        profile = ColumnProfile(column)
+        self.assertEqual(profile.valid.tolist(), [1.0, 2.5])
+        self.assertEqual(profile.n_nan, 1)
+        self.assertEqual(column.dtype, object)
+
+    def test_cached(self):
+        data = pd.DataFrame(dict(x=[1.0, 2.0]))
+        profiles = dict()
+        profile = column_profile(data, "x", profiles)
+        self.assertIs(column_profile(data, "x", profiles), profile)
+        self.assertIs(profile.sorted_valid, profile.sorted_valid)
+
+    def test_data_not_changed(self):
+        data = pd.DataFrame(dict(x=["%s" % (i % 7 - 2) for i in range(50)]))
+        elem = dict(name="x", label="x", type="number")
+        metadata = dict(name="d", resources=[dict(schema=dict(fields=[elem]))])
+        stat = write_stats.stat_dict(
+            "d", elem, "", data, metadata, "", "", "", "", "", "", "", ""
+        )
+        self.assertEqual(data["x"].dtype, object)
+        self.assertEqual(stat["uni"]["total"], 50)
+        self.assertEqual(stat["statistics"]["values"][-2], "50")
@@ -0,0 +1,305 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.read_stata import read_stata
+
+# outputs of stats_number before the single-sort kernel
+EXPECTED_DTA = {
+    ("ah-raw", "HKIND_Dummy"): [
+        "0.0",
+        "0.0",
+        "1.0",
+        "1.0909090909090908",
+        "2.0",
+        "4.0",
+        "11",
+        "1",
+    ],
+    ("ah-raw", "HKGEBA"): [
+        "1987.0",
+        "1987.0",
+        "1990.0",
+        "1991.0",
+        "1993.0",
+        "1999.0",
+        "6",
+        "6",
+    ],
+    ("ah-raw", "HKGEBB"): [
+        "1989.0",
+        "1989.0",
+        "1992.0",
+        "1992.0",
+        "1995.0",
+        "1995.0",
+        "3",
+        "9",
+    ],
+    ("ah-raw", "HKGEBC"): [
+        "1990.0",
+        "1990.0",
+        "1995.0",
+        "1995.0",
+        "2000.0",
+        "2000.0",
+        "2",
+        "10",
+    ],
+    ("ah-raw", "HKGEBD"): [
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1",
+        "11",
+    ],
+    ("ah-raw", "HM04"): [
+        "300.0",
+        "480.0",
+        "850.0",
+        "746.5",
+        "980.0",
+        "1025.0",
+        "10",
+        "2",
+    ],
+    ("ah-raw", "HNETTO"): [
+        "850.0",
+        "1700.0",
+        "3221.0",
+        "3379.6",
+        "4573.0",
+        "7413.0",
+        "10",
+        "2",
+    ],
+    ("ah-raw", "AHHNR"): ["1.0", "3.5", "6.5", "6.5", "9.5", "12.0", "12", "0"],
+    ("bh-raw", "HKIND_Dummy"): [
+        "0.0",
+        "0.0",
+        "1.0",
+        "1.1818181818181819",
+        "2.0",
+        "4.0",
+        "11",
+        "1",
+    ],
+    ("bh-raw", "HKGEBA"): [
+        "1987.0",
+        "1987.0",
+        "1990.0",
+        "1991.0",
+        "1993.0",
+        "1999.0",
+        "6",
+        "6",
+    ],
+    ("bh-raw", "HKGEBB"): [
+        "1989.0",
+        "1990.5",
+        "1993.5",
+        "1994.25",
+        "1998.0",
+        "2001.0",
+        "4",
+        "8",
+    ],
+    ("bh-raw", "HKGEBC"): [
+        "1990.0",
+        "1990.0",
+        "1995.0",
+        "1995.0",
+        "2000.0",
+        "2000.0",
+        "2",
+        "10",
+    ],
+    ("bh-raw", "HKGEBD"): [
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1",
+        "11",
+    ],
+    ("bh-raw", "HM04"): [
+        "300.0",
+        "390.0",
+        "850.0",
+        "737.5",
+        "980.0",
+        "1025.0",
+        "10",
+        "2",
+    ],
+    ("bh-raw", "HNETTO"): [
+        "850.0",
+        "2060.0",
+        "3221.0",
+        "3491.0",
+        "4573.0",
+        "7413.0",
+        "10",
+        "2",
+    ],
+    ("bh-raw", "BHHNR"): ["1.0", "3.5", "6.5", "6.5", "9.5", "12.0", "12", "0"],
+    ("ch-raw", "HKIND_Dummy"): [
+        "0.0",
+        "0.0",
+        "1.0",
+        "1.1538461538461537",
+        "2.0",
+        "4.0",
+        "13",
+        "1",
+    ],
+    ("ch-raw", "HKGEBA"): [
+        "1987.0",
+        "1987.0",
+        "1990.0",
+        "1991.857142857143",
+        "1997.0",
+        "1999.0",
+        "7",
+        "7",
+    ],
+    ("ch-raw", "HKGEBB"): [
+        "1989.0",
+        "1990.5",
+        "1995.0",
+        "1995.2",
+        "2000.0",
+        "2001.0",
+        "5",
+        "9",
+    ],
+    ("ch-raw", "HKGEBC"): [
+        "1990.0",
+        "1990.0",
+        "1995.0",
+        "1995.0",
+        "2000.0",
+        "2000.0",
+        "2",
+        "12",
+    ],
+    ("ch-raw", "HKGEBD"): [
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1999.0",
+        "nan",
+        "1999.0",
+        "1",
+        "13",
+    ],
+    ("ch-raw", "HM04"): [
+        "0.0",
+        "385.0",
+        "825.0",
+        "672.9166666666666",
+        "965.0",
+        "1025.0",
+        "12",
+        "2",
+    ],
+    ("ch-raw", "HNETTO"): [
+        "850.0",
+        "1627.0",
+        "3221.0",
+        "86501.33333333333",
+        "5767.5",
+        "999999.0",
+        "12",
+        "2",
+    ],
+    ("ch-raw", "CHHNR"): ["1.0", "4.0", "7.5", "21.0", "11.0", "201.0", "14", "0"],
+    ("test1", "id"): ["1.0", "2.0", "4.0", "4.0", "6.0", "7.0", "7", "0"],
+    ("test1", "age"): ["10.0", "15.0", "30.0", "30.0", "45.0", "50.0", "5", "2"],
+    ("test3", "id"): ["1.0", "2.0", "3.5", "3.6666667", "5.0", "7.0", "6", "0"],
+    ("test_long", "pid"): ["1.0", "2.0", "4.0", "3.85", "5.5", "7.0", "20", "0"],
+    ("test_long", "numvar"): [
+        "12.0",
+        "183.5",
+        "358.5",
+        "392.45",
+        "558.0",
+        "836.0",
+        "20",
+        "0",
+    ],
+}
+
+EXPECTED_SERIES = [
+    (
+        pd.Series([5, -1, 3, 9, 1, -2, 7, 2, 8, 4, 6], dtype="int64"),
+        ["1", "2.5", "5.0", "5.0", "7.5", "9", "11", "0"],
+        ["5.0", "11", "0"],
+    ),
+    (
+        pd.Series([5, -1, 3, 9, 1, -2, 7, 2, 8, 4], dtype="int16"),
+        ["1", "2.5", "4.5", "4.875", "7.5", "9", "10", "0"],
+        ["4.5", "10", "0"],
+    ),
+    (
+        pd.Series([1.1, 2.2, np.nan, -1, 3.3, 0.7, 5.9, 4.4], dtype="float32"),
+        [
+            "0.699999988079071",
+            "1.100000023841858",
+            "2.75",
+            "2.9333334",
+            "4.400000095367432",
+            "5.900000095367432",
+            "7",
+            "1",
+        ],
+        ["2.75", "7", "1"],
+    ),
+    (
+        pd.Series([1.1, 2.2, np.nan, -1, 3.3, 0.7, 5.9, 4.4, 1e6]),
+        ["0.7", "1.1", "3.3", "142859.65714285715", "5.9", "1000000.0", "8", "1"],
+        ["3.3", "8", "1"],
+    ),
+]
+
+
+class TestStatsNumber(unittest.TestCase):
+    def test_dta_files(self):
+        datasets = {}
+        for (dataset, name), expected in EXPECTED_DTA.items():
+            if dataset not in datasets:
+                datasets[dataset] = read_stata("test/data/%s.dta" % dataset)[0]
+            elem = dict(name=name, type="number")
+            result = write_stats.stats_number(elem, datasets[dataset])
+            self.assertEqual(result["values"], expected, (dataset, name))
+
+    def test_dtypes(self):
+        for column, expected_number, expected_cat in EXPECTED_SERIES:
+            file_csv = pd.DataFrame(dict(x=column))
+            elem = dict(name="x")
+            self.assertEqual(
+                write_stats.stats_number(elem, file_csv)["values"], expected_number
+            )
+            self.assertEqual(
+                write_stats.stats_cat(elem, file_csv)["values"], expected_cat
+            )
+            self.assertEqual(
+                write_stats.stats_number(elem, file_csv)["names"],
+                [
+                    "Min.",
+                    "1st Qu.",
+                    "Median",
+                    "Mean",
+                    "3rd Qu.",
+                    "Max.",
+                    "Valid",
+                    "Invalid",
+                ],
+            )
@@ -0,0 +1,92 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert.read_stata import cat_values, read_stata, read_stata_metadata
+from ddi.dataset import Dataset
+from test.test_accumulators import write_example_stata
+
+
+class TestReadStataMetadata(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "example.dta")
+        write_example_stata(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fields(self):
+        _, metadata = read_stata(self.path)
+        fields = metadata["resources"][0]["schema"]["fields"]
+        self.assertEqual(
+            [(elem["name"], elem["type"]) for elem in fields],
+            [
+                ("wave", "cat"),
+                ("sat", "cat"),
+                ("inc", "number"),
+                ("text", "string"),
+                ("weight", "number"),
+            ],
+        )
+        self.assertEqual(
+            fields[0]["values"],
+            [
+                dict(value=1, label="a"),
+                dict(value=2, label="b"),
+                dict(value=3, label="c"),
+            ],
+        )
+
+    def test_cat_values_without_rows(self):
+        with pd.read_stata(
+            self.path, iterator=True, convert_categoricals=False
+        ) as data:
+            label_dict = data.value_labels()
+            values = cat_values("sat", dict(name="sat", sn=1), None, data, label_dict)
+        self.assertEqual([value["value"] for value in values], [-2, -1, 0, 1, 2, 3])
+        self.assertEqual(values[0]["label"], "x")
+
+    def test_metadata_only(self):
+        for dta_name in sorted(glob.glob("test/data/*.dta")) + [self.path]:
+            _, metadata = read_stata(dta_name)
+            self.assertEqual(read_stata_metadata(dta_name), metadata)
+        _, metadata = read_stata(self.path, columns=["sat"], weight="weight")
+        self.assertEqual(
+            read_stata_metadata(self.path, columns=["sat"], weight="weight"), metadata
+        )
+
+    def test_metadata_only_dates_and_strl(self):
+        dta_name = os.path.join(self.directory, "dates.dta")
+        data = pd.DataFrame(
+            dict(
+                day=pd.to_datetime(["2020-01-01", "2021-05-03"]),
+                text=["a" * 3000, "b"],
+                n=np.array([1, 2], dtype=np.int32),
+            )
+        )
+        data.to_stata(
+            dta_name,
+            write_index=False,
+            convert_dates=dict(day="td"),
+            convert_strl=["text"],
+            version=117,
+        )
+        _, metadata = read_stata(dta_name)
+        self.assertEqual(read_stata_metadata(dta_name), metadata)
+
+    def test_dataset_metadata_only(self):
+        dataset = Dataset()
+        dataset.read_stata(self.path, metadata_only=True)
+        self.assertIsNone(dataset.dataset)
+        _, metadata = read_stata(self.path)
+        self.assertEqual(dataset.metadata, metadata)
+        do_name = os.path.join(self.directory, "example.do")
+        dataset.write_stata(do_name)
+        with open(do_name) as do_file:
+            self.assertIn('label define sat_label -2 "x", add', do_file.read())
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from ddi.convert import write_stats
+from ddi.convert.read_tdp import read_tdp
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+CSV = """id,sat,inc,text
+1,1,2.5,abc
+2,.,.,.a
+3,2,.b,12
+4,.a,4,
+"""
+
+FIELDS = [
+    dict(name="id", label="id", type="number"),
+    dict(
+        name="sat",
+        label="sat",
+        type="cat",
+        values=[dict(value=1, label="low"), dict(value=2, label="high")],
+    ),
+    dict(name="inc", label="inc", type="number"),
+    dict(name="text", label="text", type="string"),
+]
+
+
+class TestReadTdp(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_name = os.path.join(self.directory, "example.csv")
+        self.json_name = os.path.join(self.directory, "example.json")
+        with open(self.csv_name, "w") as csv_file:
+            csv_file.write(CSV)
+        with open(self.json_name, "w") as json_file:
+            json.dump(
+                dict(name="example", resources=[dict(schema=dict(fields=FIELDS))]),
+                json_file,
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stata_missings(self):
+        data, _ = read_tdp(self.csv_name, self.json_name)
+        self.assertEqual(data["id"].dtype, np.int64)
+        self.assertEqual(data["sat"].dtype, np.float64)
+        self.assertEqual(data["inc"].isnull().tolist(), [False, True, True, False])
+        self.assertTrue(data["sat"].isnull().tolist()[1])
+
+    def test_string_dtype(self):
+        data, _ = read_tdp(self.csv_name, self.json_name)
+        self.assertEqual(data["text"].dtype, object)
+        self.assertEqual(data["text"].tolist()[0::2], ["abc", "12"])
+        self.assertTrue(data["text"].isnull().tolist()[1])
+
+    def test_cat_frequencies(self):
+        data, metadata = read_tdp(self.csv_name, self.json_name)
+        elem = metadata["resources"][0]["schema"]["fields"][1]
+        uni = write_stats.uni_cat(elem, "", data, "")
+        self.assertEqual(uni["frequencies"], [1, 1])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_pyarrow(self):
+        data, _ = read_tdp(self.csv_name, self.json_name)
+        arrow, _ = read_tdp(self.csv_name, self.json_name, engine="pyarrow")
+        self.assertTrue(arrow.equals(data))
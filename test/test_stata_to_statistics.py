@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ddi.convert import stata_to_statistics as module
+from ddi.convert.read_stata import read_stata_metadata
+from ddi.dataset import Dataset
+from test.test_accumulators import write_example_stata
+
+
+class TestStataToStatistics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ["input", "input_de", "output"]:
+            os.mkdir(os.path.join(self.directory, name))
+        write_example_stata(os.path.join(self.directory, "input", "example.dta"), 200)
+        write_example_stata(
+            os.path.join(self.directory, "input_de", "example.dta"), 200
+        )
+        self.csv = os.path.join(self.directory, "datasets.csv")
+        with open(self.csv, "w") as csv_file:
+            csv_file.write("filename,weight,split,analysis_unit,period,sub_type\n")
+            csv_file.write("example,weight,wave,p,2020,raw\n")
+            csv_file.write("missing,weight,wave,p,2020,raw\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_statistics(self):
+        module.stata_to_statistics(
+            "study",
+            self.csv,
+            os.path.join(self.directory, "input", ""),
+            os.path.join(self.directory, "output", ""),
+            os.path.join(self.directory, "input_de", ""),
+        )
+
+    def test_metadata_de_without_data(self):
+        with mock.patch.object(
+            Dataset, "read_stata", autospec=True, side_effect=Dataset.read_stata
+        ) as read_stata:
+            self.run_statistics()
+        # only the data of the existing dataset, the german file is not read
+        self.assertEqual(read_stata.call_count, 1)
+        with open(os.path.join(self.directory, "output", "example_stats.json")) as f:
+            stat = json.load(f)
+        metadata_de = read_stata_metadata(
+            os.path.join(self.directory, "input_de", "example.dta")
+        )
+        fields = metadata_de["resources"][0]["schema"]["fields"]
+        self.assertEqual(
+            [elem["label_de"] for elem in stat], [elem["label"] for elem in fields]
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, "output", "missing_stats.json"))
+        )
@@ -12,3 +12,25 @@ class TestStataReader(unittest.TestCase):
             pandas.core.frame.DataFrame
         )
         self.assertTrue(len(stata.meta) > 0)
+
+    def test_parse_meta_reads_labels_once(self):
+        stata_file = pandas.read_stata(
+            "test/data/test3.dta", convert_categoricals=False, iterator=True
+        )
+        stata_file.read()
+        calls = dict(value_labels=0, variable_labels=0)
+        for name in calls:
+            function = getattr(stata_file, name)
+
+            def counted(function=function, name=name):
+                calls[name] += 1
+                return function()
+
+            setattr(stata_file, name, counted)
+        reader = statareader.StataReader.__new__(statareader.StataReader)
+        meta = reader._parse_meta(stata_file)
+        stata_file.close()
+        self.assertEqual(calls, dict(value_labels=1, variable_labels=1))
+        self.assertEqual(list(meta.keys()), ["id", "age", "sex", "occ", "happiness"])
+        self.assertEqual(meta["sex"]["sn"], 2)
+        self.assertIsNone(meta["id"]["value_list"])
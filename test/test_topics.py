@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from ddi.onrails.repos.topics import Concept, Topic, TopicParser
+
+
+class TestTopicParser(unittest.TestCase):
+    def setUp(self):
+        self.parser = TopicParser.__new__(TopicParser)
+        self.parser.topics_data = pd.DataFrame(
+            dict(
+                name=["a", "b", "c", "c", "d"],
+                parent_name=[np.nan, "a", "a", "b", "unknown"],
+                label=["A", "B", "C", "C2", "D"],
+                label_de=["A de", np.nan, "C de", "C2 de", "D de"],
+            )
+        )
+        self.parser.concepts_data = pd.DataFrame(
+            dict(
+                name=["x", "y", "z", "w"],
+                topic_name=["c", np.nan, "a", "missing"],
+                label=["X", "Y", np.nan, "W"],
+            )
+        )
+        self.parser.languages = ["en", "de"]
+
+    def tearDown(self):
+        Topic.all_objects = []
+        Concept.all_objects = []
+
+    def test_tree(self):
+        result = self.parser._create_json()
+        self.assertEqual([x["language"] for x in result], ["en", "de"])
+        topics = result[0]["topics"]
+        self.assertEqual([topic["key"] for topic in topics], ["topic_a"])
+        children = topics[0]["children"]
+        self.assertEqual(
+            [child["key"] for child in children],
+            ["topic_b", "topic_c", "concept_z"],
+        )
+        # the first topic of a name is the parent
+        self.assertEqual(
+            [child["key"] for child in children[0]["children"]], ["topic_c"]
+        )
+        self.assertEqual(children[0]["children"][0]["children"], [])
+        self.assertEqual(children[1]["children"][0]["title"], "X")
+        self.assertEqual(children[2]["title"], "")
+
+    def test_languages(self):
+        topics = self.parser._create_json()[1]["topics"]
+        self.assertEqual(topics[0]["title"], "A de")
+        children = topics[0]["children"]
+        self.assertEqual(children[0]["title"], "")
+        # no label_de for concepts: the name
+        self.assertEqual(children[1]["children"][0]["title"], "x")
+        self.assertEqual(Topic.all_objects, [])
+        self.assertEqual(Concept.all_objects, [])
+
+    def test_built_once(self):
+        with mock.patch.object(
+            Topic, "__init__", autospec=True, side_effect=Topic.__init__
+        ) as topic_init, mock.patch.object(
+            Concept, "__init__", autospec=True, side_effect=Concept.__init__
+        ) as concept_init, mock.patch.object(
+            Topic, "add_topics_to_parents", wraps=Topic.add_topics_to_parents
+        ) as add_topics:
+            result = self.parser._create_json()
+        self.assertEqual(len(result), 2)
+        self.assertEqual(topic_init.call_count, 5)
+        self.assertEqual(concept_init.call_count, 3)
+        self.assertEqual(add_topics.call_count, 1)
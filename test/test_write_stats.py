@@ -0,0 +1,247 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ddi.convert import write_stats
+from ddi.convert.frequencies import (
+    CategoricalCodes,
+    encode_categoricals,
+    weighted_frequencies,
+)
+from ddi.convert.profile import ColumnProfile
+from ddi.convert.quantiles import sorted_median
+
+
+def example_data(rows=500, seed=1):
+    random = np.random.RandomState(seed)
+    data = pd.DataFrame(
+        dict(
+            wave=random.choice([1, 2, 3, 4], rows).astype(float),
+            sat=random.choice([-2, -1, 0, 1, 2, 3, np.nan], rows),
+            inc=random.choice([-1, -3], rows).astype(float),
+            text=random.choice(["a", "b", "-1", "-2 bla", np.nan, "c"], rows),
+            weight=random.uniform(0.5, 3, rows),
+        )
+    )
+    valid = random.uniform(size=rows) > 0.2
+    data.loc[valid, "inc"] = random.lognormal(7, 1, valid.sum())
+    metadata = dict(
+        name="example",
+        resources=[
+            dict(
+                path="example.dta",
+                schema=dict(
+                    fields=[
+                        dict(
+                            name="wave",
+                            label="Wave",
+                            type="cat",
+                            values=[dict(value=v, label="W%s" % v) for v in [1, 2, 3]],
+                        ),
+                        dict(
+                            name="sat",
+                            label="Satisfaction",
+                            type="cat",
+                            values=[
+                                dict(value=v, label="S%s" % v)
+                                for v in [-2, -1, 0, 1, 2]
+                            ],
+                        ),
+                        dict(name="inc", label="Income", type="number"),
+                        dict(name="text", label="Text", type="string"),
+                        dict(name="weight", label="Weight", type="number"),
+                    ]
+                ),
+            )
+        ],
+    )
+    return data, metadata
+
+
+def naive_bi(elem, file_csv, metadata, split, weight):
+    """bi() computed with one uni() call per category of the split variable."""
+    temp = [
+        x for x in metadata["resources"][0]["schema"]["fields"] if x["name"] == split
+    ][0]
+    result = OrderedDict([(split, OrderedDict())])
+    categories = OrderedDict()
+    if temp["type"] == "number":
+        keys = [int(v) for v in file_csv[split].dropna().unique()]
+        labels = keys
+    else:
+        keys = [v["value"] for v in temp["values"]]
+        labels = [v["label"] for v in temp["values"]]
+    for key, label in zip(keys, labels):
+        statistics = write_stats.uni(
+            elem, "", file_csv[file_csv[split] == key].copy(), weight
+        )
+        statistics["label"] = label
+        if elem["type"] == "cat":
+            for i in ["values", "missings", "labels"]:
+                result[split][i] = statistics.pop(i)
+        elif elem["type"] == "number":
+            uni_source = write_stats.uni(elem, "", file_csv.copy(), weight)
+            for i in ["min", "max", "by"]:
+                result[split][i] = uni_source[i]
+                del statistics[i]
+        categories[str(key)] = statistics
+    result[split]["label"] = temp["label"]
+    result[split]["categories"] = OrderedDict(sorted(categories.items()))
+    return result
+
+
+class TestBi(unittest.TestCase):
+    def setUp(self):
+        self.data, self.metadata = example_data()
+        self.fields = self.metadata["resources"][0]["schema"]["fields"]
+
+    def assertSameJson(self, first, second):
+        self.assertEqual(json.dumps(first), json.dumps(second))
+
+    def test_bi_matches_uni_per_category(self):
+        for split in ["wave", "weight"]:
+            if split == "weight":
+                self.data["weight"] = self.data["weight"].round()
+                self.fields[4]["type"] = "number"
+            for weight in ["", "weight"]:
+                for elem in self.fields[1:4]:
+                    result = write_stats.bi(
+                        elem["name"],
+                        elem,
+                        "",
+                        elem["type"][0:3],
+                        self.data.copy(),
+                        self.metadata,
+                        split,
+                        weight,
+                    )
+                    expected = naive_bi(elem, self.data, self.metadata, split, weight)
+                    self.assertSameJson(result, expected)
+
+    def test_weighted_frequencies(self):
+        elem = self.fields[1]
+        result = write_stats.uni_cat(elem, "", self.data, "weight")
+        for value, weighted in zip(elem["values"], result["weighted"]):
+            rows = self.data["sat"] == value["value"]
+            self.assertEqual(weighted, int(self.data.loc[rows, "weight"].sum()))
+
+
+class TestStringStatistics(unittest.TestCase):
+    def setUp(self):
+        values = ["a", "b", "-1", "x-2", "", ".", None, np.nan, "a", "nan", 3, -1]
+        self.data = pd.DataFrame(dict(text=pd.Series(values, dtype=object)))
+        self.elem = dict(name="text", type="string")
+
+    def test_uni_string(self):
+        result = write_stats.uni_string(self.elem, self.data)
+        # distinct values: a, b, "", ".", None and 3 are no missings
+        self.assertEqual(result["frequencies"], [6])
+        self.assertEqual(result["missings"], [5])
+
+    def test_stats_string(self):
+        result = write_stats.stats_string(self.elem, self.data)
+        self.assertEqual(result["values"], ["8", "4"])
+
+
+class TestCategoricalCodes(unittest.TestCase):
+    def test_frequencies(self):
+        column = pd.Series([2, 1, np.nan, 2, 5, -1])
+        codes = CategoricalCodes(column, [1, 2, 3, -1])
+        self.assertEqual(codes.codes.dtype, np.int8)
+        self.assertEqual(codes.unlabelled, 1)
+        self.assertEqual(codes.frequencies().tolist(), [[1, 2, 0, 1]])
+        weights = [1.0, 2.0, 3.0, 4.0, 5.0, np.nan]
+        self.assertEqual(codes.frequencies(weights).tolist(), [[2, 5, 0, 0]])
+
+    def test_median(self):
+        random = np.random.RandomState(2)
+        for dtype in [np.int8, np.int32, np.float32, np.float64]:
+            for rows in [0, 1, 2, 101, 1000]:
+                column = pd.Series(random.choice([-1, 1, 2, 3, 7], rows).astype(dtype))
+                codes = CategoricalCodes(column, [-1, 1, 2, 3, 7])
+                expected = sorted_median(ColumnProfile(column).sorted_valid)
+                self.assertEqual(str(codes.median()), str(expected))
+        codes = CategoricalCodes(pd.Series([1, 2, 4]), [1, 2])
+        self.assertIsNone(codes.median())
+
+    def test_generate_stat_with_codes(self):
+        data, metadata = example_data()
+        fields = metadata["resources"][0]["schema"]["fields"]
+        codes = encode_categoricals(data, fields)
+        self.assertEqual(sorted(codes.keys()), ["sat", "wave"])
+        arguments = ("example", data, metadata, "", "", "wave", "weight")
+        arguments += ("",) * 5
+        expected = write_stats.generate_stat(*arguments)
+        result = write_stats.generate_stat(*arguments, codes=codes)
+        self.assertEqual(json.dumps(result), json.dumps(expected))
+
+
+class TestGenerateStat(unittest.TestCase):
+    def test_precomputed_weighted_frequencies(self):
+        data, metadata = example_data()
+        fields = metadata["resources"][0]["schema"]["fields"]
+        weighted = weighted_frequencies(data, fields, "weight")
+        self.assertEqual(sorted(weighted.keys()), ["inc", "sat", "wave"])
+        for elem in fields:
+            expected = write_stats.uni(elem, "", data.copy(), "weight")
+            result = write_stats.uni(elem, "", data.copy(), "weight", weighted=weighted)
+            self.assertEqual(json.dumps(result), json.dumps(expected))
+
+    def test_parallel_matches_serial(self):
+        data, metadata = example_data()
+        arguments = (
+            "example",
+            data,
+            metadata,
+            "",
+            "",
+            "wave",
+            "weight",
+            "",
+            "",
+            "",
+            "",
+            "",
+        )
+        serial = write_stats.generate_stat(*arguments)
+        parallel = write_stats.generate_stat(*arguments, jobs=2)
+        self.assertEqual(len(serial), len(metadata["resources"][0]["schema"]["fields"]))
+        self.assertEqual(json.dumps(parallel), json.dumps(serial))
+
+
+class TestWriteStats(unittest.TestCase):
+    def setUp(self):
+        self.data, self.metadata = example_data()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, file_type="json", **kwargs):
+        filename = os.path.join(self.directory, "example.%s" % file_type)
+        write_stats.write_stats(
+            self.data, self.metadata, filename, file_type, split="wave", **kwargs
+        )
+        with open(filename) as f:
+            return f.read()
+
+    def test_stream_json(self):
+        expected = self.write()
+        self.assertEqual(self.write(stream=True), expected)
+        compact = self.write(stream=True, compact=True)
+        self.assertNotIn("\n", compact)
+        self.assertEqual(json.loads(compact), json.loads(expected))
+
+    def test_stream_jsonl(self):
+        lines = self.write("jsonl", stream=True).splitlines()
+        self.assertEqual([json.loads(x) for x in lines], json.loads(self.write()))
+
+    def test_stream_templates(self):
+        for file_type in ["html", "md"]:
+            self.assertEqual(self.write(file_type, stream=True), self.write(file_type))